@@ -1,6 +1,6 @@
 """
 Wrapper script to run the Flask application with the correct port from environment variable.
-This is needed for deployment on Render.
+Uses the Flask development server; deployments run wsgi:app under gunicorn instead.
 """
 
 import os
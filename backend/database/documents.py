@@ -56,6 +56,45 @@ def save_transcription(text, emotion=None, source="automatic", user_id=None):
         logger.error(f"Error saving transcription: {str(e)}")
         raise
 
+def save_transcriptions(transcriptions):
+    """
+    Save several transcriptions to the database in one bulk write.
+    
+    Args:
+        transcriptions (list): Dicts with the save_transcription arguments ("text", and
+            optionally "emotion", "source", "user_id") plus an optional "timestamp"
+    
+    Returns:
+        list: IDs of the inserted documents
+    """
+    if not transcriptions:
+        return []
+    
+    try:
+        collection = get_transcriptions_collection()
+        
+        # Create documents
+        documents = []
+        for transcription in transcriptions:
+            document = {
+                "text": transcription["text"],
+                "emotion": transcription.get("emotion"),
+                "timestamp": transcription.get("timestamp") or datetime.now().isoformat(),
+                "source": transcription.get("source", "automatic")
+            }
+            if transcription.get("user_id"):
+                document["user_id"] = transcription["user_id"]
+            documents.append(document)
+        
+        # Insert documents (unordered, so one failure doesn't stop the rest)
+        result = collection.insert_many(documents, ordered=False)
+        logger.info(f"Saved {len(result.inserted_ids)} transcriptions in bulk")
+        
+        return result.inserted_ids
+    except Exception as e:
+        logger.error(f"Error saving transcriptions: {str(e)}")
+        raise
+
 def get_transcriptions(limit=10, page=1, emotion=None, user_id=None):
     """
     Get transcriptions with pagination and filtering options.
@@ -247,6 +286,46 @@ def save_detected_sound(sound, confidence, direction, angle, user_id=None):
         logger.error(f"Error saving detected sound: {str(e)}")
         raise
 
+def save_detected_sounds(sounds):
+    """
+    Save several detected sounds to the database in one bulk write.
+    
+    Args:
+        sounds (list): Dicts with the save_detected_sound arguments ("sound", "confidence",
+            "direction", "angle", and optionally "user_id") plus an optional "timestamp"
+    
+    Returns:
+        list: IDs of the inserted documents
+    """
+    if not sounds:
+        return []
+    
+    try:
+        collection = get_sound_alerts_collection()
+        
+        # Create documents
+        documents = []
+        for sound in sounds:
+            document = {
+                "sound": sound["sound"],
+                "confidence": sound["confidence"],
+                "direction": sound["direction"],
+                "angle": sound["angle"],
+                "timestamp": sound.get("timestamp") or datetime.now().isoformat()
+            }
+            if sound.get("user_id"):
+                document["user_id"] = sound["user_id"]
+            documents.append(document)
+        
+        # Insert documents (unordered, so one failure doesn't stop the rest)
+        result = collection.insert_many(documents, ordered=False)
+        logger.info(f"Saved {len(result.inserted_ids)} detected sounds in bulk")
+        
+        return result.inserted_ids
+    except Exception as e:
+        logger.error(f"Error saving detected sounds: {str(e)}")
+        raise
+
 # Functions for Chat Messages
 def save_chat_message(message, response, context=None, user_id="default"):
     """
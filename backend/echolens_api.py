@@ -1,15 +1,27 @@
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, Response, stream_with_context
 from flask_cors import CORS
+from flask_compress import Compress
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
 import os
-import json
+import re
+import csv
 import time
 import logging
+import atexit
+import queue
 import threading
 import numpy as np
 import base64
 import random
+import itertools
+import asyncio
+import concurrent.futures
 import cv2
+import orjson
 from io import BytesIO
+from collections import deque
+from cachetools import LRUCache, TTLCache
+from logging.handlers import QueueHandler, QueueListener
 from PIL import Image
 
 # Load environment variables from .env file
@@ -36,21 +48,26 @@ if not hasattr(np, 'float'):
 import google.generativeai as genai
 from datetime import datetime
 import sounddevice as sd
-import queue
 import speech_recognition as sr
 from scipy import signal
 import tensorflow as tf
 import tensorflow_hub as hub
 
+# Local speech recognition is optional; without it speech goes to Google Speech Recognition
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
 # Import database functions
 from database.dbclient import get_db, get_collection
 from database.documents import (
     save_chat_message, 
     get_chat_history, 
     clear_chat_history,
-    save_detected_sound,
+    save_detected_sounds,
     get_sound_alerts as db_get_sound_alerts,
-    save_transcription,
+    save_transcriptions,
     get_transcriptions as db_get_transcriptions,
     clear_transcriptions_from_db
 )
@@ -58,21 +75,128 @@ from database.documents import (
 # Define log file path
 log_file_path = os.path.join(os.path.dirname(__file__), 'echolens.log')
 
+# Log records are queued and written to the console and log file by a
+# background listener, so request and audio threads never block on log I/O
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(
+    log_queue,
+    logging.StreamHandler(),
+    logging.FileHandler(log_file_path),
+    respect_handler_level=True
+)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# Log level (DEBUG captures all database operations; production sets LOG_LEVEL=INFO)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "DEBUG").upper()
+
 # Configure logging
 logging.basicConfig(
-    level=logging.DEBUG,  # Set to DEBUG to capture all database operations
+    level=LOG_LEVEL,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(log_file_path)
-    ]
+    handlers=[QueueHandler(log_queue)]
 )
 logger = logging.getLogger(__name__)
 logger.info(f"Logging to file: {log_file_path}")
 logger.info(f"Log file cleared at application startup")
 
-# Ensure database module's logger is also set to DEBUG level
-logging.getLogger('database.dbclient').setLevel(logging.DEBUG)
+# Ensure database module's logger also uses LOG_LEVEL, and route it through the
+# log queue: its own console and file handlers wrote synchronously (and duplicated every
+# record, which also propagates to the root queue handler)
+db_logger = logging.getLogger('database.dbclient')
+db_logger.setLevel(LOG_LEVEL)
+for handler in list(db_logger.handlers):
+    db_logger.removeHandler(handler)
+    handler.close()
+
+# (second, ISO string) most recently formatted by now_iso()
+response_timestamp_cache = (None, None)
+
+def json_response(data, status=200):
+    """Create a JSON response, serialized with orjson"""
+    return json_body_response(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY), status)
+
+def json_body_response(body, status=200):
+    """Create a JSON response from an already serialized body"""
+    return Response(body, status=status, mimetype='application/json')
+
+def now_iso():
+    """
+    Current local time as an ISO 8601 string at second precision, for response timestamps
+    
+    The string is formatted once per second and reused by every response in that second.
+    """
+    global response_timestamp_cache
+    
+    current_second = int(time.time())
+    cached_second, timestamp = response_timestamp_cache
+    if cached_second != current_second:
+        timestamp = datetime.fromtimestamp(current_second).isoformat()
+        response_timestamp_cache = (current_second, timestamp)
+    return timestamp
+
+def get_json_body():
+    """
+    Parse the request body as JSON with orjson instead of Flask's stdlib-based parser
+    
+    Returns:
+        Parsed JSON value, or None if the request isn't JSON (like request.get_json())
+    """
+    if not request.is_json:
+        return None
+    try:
+        return orjson.loads(request.get_data(cache=True))
+    except orjson.JSONDecodeError:
+        raise BadRequest("Failed to decode JSON object")
+
+def get_limit_arg(default):
+    """
+    Read the "limit" query argument, capped at MAX_PAGE_LIMIT
+    
+    Args:
+        default: Limit to use when the argument is missing, not an integer or not positive
+            (pymongo treats a limit of 0 as no limit at all)
+        
+    Returns:
+        Page size as an int
+    """
+    raw_limit = request.args.get('limit')
+    if raw_limit is None:
+        return default
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        return default
+    if limit <= 0:
+        return default
+    return min(limit, MAX_PAGE_LIMIT)
+
+def etag_matches(etag):
+    """
+    Check whether the request's If-None-Match header names the given ETag
+
+    Flask-Compress appends the encoding to the ETag of a compressed response
+    (W/"v" becomes W/"v:br"), so that suffix is ignored when comparing.
+
+    Args:
+        etag: Current ETag of the resource, as sent in the ETag header
+
+    Returns:
+        True if the client already has this version
+    """
+    for tag in request.headers.get("If-None-Match", "").split(","):
+        tag = tag.strip()
+        for suffix in COMPRESSED_ETAG_SUFFIXES:
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)] + '"'
+                break
+        if tag == etag:
+            return True
+    return False
+
+def not_modified_response(etag):
+    """Create an empty 304 response for a client that already has the current version"""
+    return Response(status=304, headers={"ETag": etag})
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -82,6 +206,111 @@ CORS(app,
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
      allow_headers=["Content-Type", "Authorization", "Accept"])
 
+# Compress JSON bodies large enough to benefit (e.g. transcription and alert lists)
+app.config["COMPRESS_MIMETYPES"] = ["application/json"]
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_LEVEL"] = 6
+app.config["COMPRESS_MIN_SIZE"] = 512
+Compress(app)
+
+# Endings Flask-Compress gives the ETag of a compressed response (closing quote included)
+COMPRESSED_ETAG_SUFFIXES = tuple(f':{algorithm}"' for algorithm in app.config["COMPRESS_ALGORITHM"])
+
+# Largest request body accepted; requests carry short texts, never uploads
+app.config["MAX_CONTENT_LENGTH"] = 64 * 1024
+
+# Longest text accepted for emotion analysis, chat and environment analysis
+MAX_TEXT_LENGTH = 4000
+
+@app.before_request
+def reject_oversize_body():
+    """Reject oversize bodies by their declared length, before any JSON parsing"""
+    max_length = app.config["MAX_CONTENT_LENGTH"]
+    if request.content_length is not None and request.content_length > max_length:
+        raise RequestEntityTooLarge()
+
+@app.errorhandler(RequestEntityTooLarge)
+def handle_request_too_large(e):
+    """Return oversize request errors as JSON"""
+    return json_response({
+        "error": f"Request body too large (maximum {app.config['MAX_CONTENT_LENGTH']} bytes)"
+    }), 413
+
+# Standing instructions for /api/chat, sent as the chat model's system instruction
+CHAT_SYSTEM_INSTRUCTION = """You are EchoLens.AI, an AI assistant specialized in helping deaf and hard-of-hearing users understand their audio environment.
+
+Respond to the user in a way that acknowledges their emotional state and provides helpful information.
+If the user seems confused or frustrated, be extra clear and supportive in your response.
+If the user is asking about sounds or audio features, explain how EchoLens can help detect and classify important sounds.
+If the user mentions emotions or speech detection, explain how EchoLens can analyze speech for emotional content.
+
+Keep your response concise (2-4 sentences) and friendly.
+"""
+
+# Emotions we can detect
+detectable_emotions = [
+    "happy", "excited", "sad", "angry", "surprised", "confused", 
+    "frustrated", "neutral", "concerned", "sarcastic"
+]
+
+# Emotion labels as listed in prompts
+EMOTION_LABELS = ", ".join(detectable_emotions)
+
+# Structured output schema for a single emotion analysis; Gemini is constrained
+# to return this JSON shape (per line, see below) with an emotion from detectable_emotions
+EMOTION_ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "emotion": {"type": "STRING", "enum": detectable_emotions, "description": "The primary emotion"},
+        "confidence": {"type": "NUMBER", "description": "Confidence between 0 and 1"},
+        "intensity": {"type": "NUMBER", "description": "Intensity between 0 and 1"},
+        "explanation": {"type": "STRING", "description": "Short explanation of why this emotion was detected"}
+    },
+    "required": ["emotion", "confidence", "intensity", "explanation"]
+}
+
+# Structured output schema for batch emotion analysis, one object per numbered line
+BATCH_EMOTION_ANALYSIS_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "INTEGER", "description": "The line number"},
+            **EMOTION_ANALYSIS_SCHEMA["properties"]
+        },
+        "required": ["id"] + EMOTION_ANALYSIS_SCHEMA["required"]
+    }
+}
+
+# Local speech recognition model (set WHISPER_MODEL="" to use Google Speech Recognition instead)
+WHISPER_MODEL_SIZE = os.environ.get("WHISPER_MODEL", "base.en")
+
+# Optional (e.g. int8-quantized) TFLite YAMNet classifier used for inference instead of
+# the TF-Hub SavedModel; class names still come from the SavedModel's class map
+YAMNET_TFLITE_MODEL = os.environ.get("YAMNET_TFLITE_MODEL", "")
+YAMNET_FRAME_SAMPLES = 15600  # 0.975 s waveform window taken by the TFLite classifier
+YAMNET_HOP_SAMPLES = 7680  # 0.48 s hop, matching the SavedModel's patch hop
+
+# Gemini request settings
+GEMINI_TIMEOUT = 30  # seconds to wait for a Gemini response
+GEMINI_MAX_CONCURRENT = 20  # Gemini calls in flight before new ones are refused
+EMOTION_MAX_OUTPUT_TOKENS = 256  # Per analysis: emotion, scores and a short explanation
+
+# Emotion analysis cache settings
+EMOTION_CACHE_SIZE = 4096  # Distinct texts whose Gemini emotion analysis is kept
+CHAT_CACHE_SIZE = 1024  # Distinct chat prompts whose reply is kept
+CHAT_CACHE_TTL = 60  # seconds a cached chat reply is reused (covers retries and resubmits)
+
+# Emotion analysis batching settings
+EMOTION_BATCH_SIZE = 8  # Transcriptions classified per Gemini call (keep <= 16, larger batches add latency)
+EMOTION_BATCH_INTERVAL = 0.05  # seconds to wait for more texts once one is queued, before sending a batch
+
+# Gemini models (stay None if the API can't be configured)
+model = None
+chat_model = None
+batch_emotion_model = None
+context_chat = None
+
 # Configure Gemini API
 try:
     # Get API key from environment variable
@@ -126,15 +355,29 @@ try:
             safety_settings=safety_settings
         )
         
-        # Initialize a conversation model for maintaining context
-        convo_model = genai.GenerativeModel(
+        # Model for /api/chat with the standing instructions as a system instruction
+        chat_model = genai.GenerativeModel(
             model_name=target_model,
             generation_config=generation_config,
+            safety_settings=safety_settings,
+            system_instruction=CHAT_SYSTEM_INSTRUCTION
+        )
+        
+        # Model for text emotion analysis, constrained to the batch emotion JSON schema
+        batch_emotion_model = genai.GenerativeModel(
+            model_name=target_model,
+            generation_config={
+                **generation_config,
+                "max_output_tokens": EMOTION_MAX_OUTPUT_TOKENS * EMOTION_BATCH_SIZE,
+                "response_mime_type": "application/json",
+                "response_schema": BATCH_EMOTION_ANALYSIS_SCHEMA
+            },
             safety_settings=safety_settings
         )
         
-        # Create a chat session
-        chat = convo_model.start_chat(
+        # Create a chat session for maintaining context (the general model has the same configuration
+        # a separate conversation model would, so the session is started on it)
+        context_chat = model.start_chat(
             history=[
                 {
                     "role": "user",
@@ -151,8 +394,22 @@ try:
 except Exception as e:
     logger.error(f"Failed to configure Gemini API: {str(e)}")
     model = None
-    chat = None
-    convo_model = None
+    chat_model = None
+    batch_emotion_model = None
+    context_chat = None
+
+# Load local Whisper model for speech recognition (falls back to Google Speech Recognition)
+stt_model = None
+if WhisperModel is not None and WHISPER_MODEL_SIZE:
+    try:
+        logger.info(f"Loading Whisper model '{WHISPER_MODEL_SIZE}' for speech recognition...")
+        stt_model = WhisperModel(WHISPER_MODEL_SIZE, device="cpu", compute_type="int8")
+        logger.info("Whisper model loaded successfully")
+    except Exception as e:
+        logger.error(f"Failed to load Whisper model: {str(e)}")
+        stt_model = None
+else:
+    logger.info("Whisper speech recognition disabled, using Google Speech Recognition")
 
 # Load YAMNet model for audio classification
 try:
@@ -163,6 +420,30 @@ except Exception as e:
     logger.error(f"Failed to load YAMNet model: {str(e)}")
     yamnet_model = None
 
+# YAMNet inference traced once for any 1-D float32 waveform and compiled with XLA
+# (replaced by the plain SavedModel call if compilation fails)
+yamnet_infer = None
+if yamnet_model is not None:
+    yamnet_infer = tf.function(
+        lambda waveform: yamnet_model(waveform),
+        input_signature=[tf.TensorSpec(shape=[None], dtype=tf.float32)],
+        jit_compile=True
+    )
+
+# TFLite YAMNet interpreter, tensors allocated once (only used if YAMNET_TFLITE_MODEL is set)
+yamnet_tflite = None
+yamnet_tflite_lock = threading.Lock()
+if yamnet_model is not None and YAMNET_TFLITE_MODEL:
+    try:
+        logger.info(f"Loading TFLite YAMNet model from {YAMNET_TFLITE_MODEL}...")
+        yamnet_tflite = tf.lite.Interpreter(model_path=YAMNET_TFLITE_MODEL, num_threads=os.cpu_count())
+        yamnet_tflite.resize_tensor_input(yamnet_tflite.get_input_details()[0]["index"], [YAMNET_FRAME_SAMPLES])
+        yamnet_tflite.allocate_tensors()
+        logger.info("TFLite YAMNet model loaded successfully")
+    except Exception as e:
+        logger.error(f"Failed to load TFLite YAMNet model, using the SavedModel: {str(e)}")
+        yamnet_tflite = None
+
 # Default user preferences
 default_preferences = {
     "transcription_enabled": True,
@@ -174,39 +455,176 @@ default_preferences = {
     "important_sounds": ["doorbell", "alarm", "phone", "name_called", "car horn", "siren", "dog", "baby crying", "knock"]
 }
 
+# Maximum number of transcriptions/sound alerts kept in memory (oldest are dropped)
+MAX_STORED_RECORDS = 1000
+MAX_PAGE_LIMIT = MAX_STORED_RECORDS  # Largest page size the list endpoints return
+
 # In-memory database for development
+# Records are appended in arrival order, so the newest are always at the right end
 mock_db = {
     "user_preferences": default_preferences,
-    "transcriptions": [],
-    "sound_alerts": []
+    "transcriptions": deque(maxlen=MAX_STORED_RECORDS),
+    "sound_alerts": deque(maxlen=MAX_STORED_RECORDS)
 }
 
-# Emotions we can detect
-detectable_emotions = [
-    "happy", "excited", "sad", "angry", "surprised", "confused", 
-    "frustrated", "neutral", "concerned", "sarcastic"
-]
+# Guards mock_db record collections, which the audio threads and request handlers share
+mock_db_lock = threading.Lock()
+
+# Bumped (under mock_db_lock) whenever a collection changes; used for ETags on the list endpoints.
+# They start from the process start time so ETags from a previous run never match.
+mock_db_versions = dict.fromkeys(("transcriptions", "sound_alerts"), time.time_ns())
+
+# New records waiting to be moved into mock_db by the ingest thread, as (collection, records) pairs
+record_ingest_queue = queue.SimpleQueue()
+
+# Documents waiting to be bulk-written to MongoDB, as (collection, fields) pairs
+db_write_queue = queue.SimpleQueue()
+DB_WRITE_INTERVAL = 0.5  # seconds to gather more documents after the first arrives
+DB_WRITE_BATCH_SIZE = 100  # Most documents sent in one insert_many
+DB_BULK_SAVERS = {
+    "transcriptions": save_transcriptions,
+    "sound_alerts": save_detected_sounds
+}
+
+# Unique id generators for in-memory records
+record_id_counters = {
+    "transcriptions": itertools.count(1),
+    "sound_alerts": itertools.count(1)
+}
+
+# Serialized response bodies reused across requests
+status_response_cache = (None, None)  # (cache key, body)
+preferences_response_body = None
+preferences_lock = threading.Lock()
+# Bumped (under preferences_lock) on every preferences update; used for the preferences ETag
+preferences_version = time.time_ns()
+
+# Batch emotion analysis prompt, built once ({lines} is filled in per call; the output
+# format comes from the batch model's response schema)
+BATCH_EMOTION_PROMPT_TEMPLATE = """
+Analyze the emotional tone of each numbered line below, returning one result per line.
+
+Lines to analyze:
+{lines}
+"""
+
+# Environment analysis prompt for analyze_multimodal_with_gemini ({speech_text} is empty
+# when there is no transcription, otherwise a blank-line-delimited "Transcribed speech" line)
+MULTIMODAL_ANALYSIS_PROMPT_TEMPLATE = """You are EchoLens.AI, an advanced audio environment analyzer for deaf and hard-of-hearing users.
+Your task is to analyze both visual and audio information to provide a complete understanding of what's happening.
+Provide context, identify potential audio events that might be occurring based on the image, and explain the relationship between what's seen and heard.
+
+Information available:
+{speech_text}
+{sound_text}
+
+{direction_text}
+
+{emotion_text}
+
+Provide the following in your response:
+1. A brief description of what's happening (combining visual and audio information)
+2. Important sounds that might be present in this environment even if not detected
+3. Any safety concerns or important information for a deaf or hard-of-hearing user
+
+Format the response in a clear, concise way. Keep the entire response under 150 words."""
+
+# Per-message chat prompt; the standing instructions are the chat model's system instruction
+CHAT_PROMPT_TEMPLATE = """User Message: "{message}"
+Emotional Context: {emotion} (Intensity: {intensity})
+"""
+
+# Markdown code block around a JSON payload in a free-form Gemini response
+GEMINI_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+# Keywords used by the rule-based fallback emotion analysis
+FALLBACK_EMOTION_KEYWORDS = {
+    "happy": ["happy", "joy", "glad", "excellent", "great", "wonderful", "love", "yay", "smile"],
+    "excited": ["excited", "amazing", "wow", "awesome", "incredible", "thrilled"],
+    "sad": ["sad", "sorry", "unfortunate", "miss", "regret", "disappoint", "cry"],
+    "angry": ["angry", "mad", "frustrat", "annoyed", "hate", "upset", "furious"],
+    "surprised": ["surprise", "shock", "unexpected", "woah", "whoa", "oh my"],
+    "confused": ["confused", "unclear", "don't understand", "what?", "huh?", "lost"],
+    "neutral": ["okay", "fine", "alright", "so", "and", "the", "a"]
+}
+
+# Fallback keyword lookup tables, built once:
+# - the emotion each keyword counts towards
+# - the keywords each keyword starts with (including itself)
+# - one regex finding the longest keyword starting at every position of the text;
+#   with the prefix table this finds every keyword present in a single scan
+FALLBACK_KEYWORD_EMOTIONS = {
+    keyword: emotion for emotion, keywords in FALLBACK_EMOTION_KEYWORDS.items() for keyword in keywords
+}
+FALLBACK_KEYWORD_PREFIXES = {
+    keyword: [prefix for prefix in FALLBACK_KEYWORD_EMOTIONS if keyword.startswith(prefix)]
+    for keyword in FALLBACK_KEYWORD_EMOTIONS
+}
+FALLBACK_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(FALLBACK_KEYWORD_EMOTIONS, key=len, reverse=True)) + "))"
+)
+
+# Explanations attached to demo transcriptions
+DEMO_EMOTION_EXPLANATIONS = {
+    "happy": "The text contains positive language and enthusiasm",
+    "excited": "The text shows high energy and enthusiasm",
+    "sad": "The text expresses regret or disappointment",
+    "angry": "The text contains forceful language and frustration",
+    "surprised": "The text indicates unexpected information",
+    "confused": "The text expresses uncertainty or lack of clarity",
+    "frustrated": "The text shows dissatisfaction and obstacles",
+    "neutral": "The text is factual without strong emotion",
+    "concerned": "The text shows worry about a situation",
+    "sarcastic": "The text has contradictory sentiment with implied meaning"
+}
+
+# Emotion of each demo phrase, so demo transcriptions never need classifying
+DEMO_PHRASE_EMOTIONS = {
+    "I'm really excited about this project!": "excited",
+    "I'm not sure if this is working correctly.": "concerned",
+    "Could you repeat that? I didn't hear you.": "confused",
+    "That's amazing news! I'm so happy for you!": "happy",
+    "I'm sorry to hear that, that must be difficult.": "sad",
+    "Wait, what did you just say? That's surprising!": "surprised",
+    "I'm a bit frustrated with this situation.": "frustrated",
+    "Let's meet tomorrow to discuss the project details.": "neutral",
+    "That doesn't make any sense, I'm confused.": "confused",
+    "Can you speak louder? It's hard to hear you.": "frustrated"
+}
 
 # Common phrases for demo/testing
-demo_phrases = [
-    "I'm really excited about this project!",
-    "I'm not sure if this is working correctly.",
-    "Could you repeat that? I didn't hear you.",
-    "That's amazing news! I'm so happy for you!",
-    "I'm sorry to hear that, that must be difficult.",
-    "Wait, what did you just say? That's surprising!",
-    "I'm a bit frustrated with this situation.",
-    "Let's meet tomorrow to discuss the project details.",
-    "That doesn't make any sense, I'm confused.",
-    "Can you speak louder? It's hard to hear you."
-]
+demo_phrases = tuple(DEMO_PHRASE_EMOTIONS)
 
 # Common sounds for demo/testing
-demo_sounds = [
+demo_sounds = (
     "doorbell", "alarm", "phone ringing", "car horn", "dog", "baby crying",
     "siren", "applause", "footsteps", "knock", "water running", "typing",
     "bird", "music", "speech", "drum", "engine", "clock"
-]
+)
+
+# Directions reported by demo sound alerts
+DEMO_DIRECTIONS = ("left", "right", "center")
+
+# Random number generator for demo data and simulated audio levels
+demo_rng = random.Random()
+
+# Class names used when the YAMNet class map can't be read
+FALLBACK_SOUND_CLASS_NAMES = [
+    "Speech", "Music", "Dog", "Cat", "Bird", "Vehicle", "Alarm", 
+    "Doorbell", "Phone", "Water", "Wind", "Footsteps", "Knock",
+    "Typing", "Applause", "Baby Crying", "Siren", "Clock", "Bell"
+] + [f"Sound_{i}" for i in range(512)]  # Add fallback for index overflows
+
+# YAMNet class names, read once from the model's class map CSV
+yamnet_class_names = FALLBACK_SOUND_CLASS_NAMES
+if yamnet_model is not None:
+    try:
+        class_map_path = yamnet_model.class_map_path().numpy().decode('utf-8')
+        logger.info(f"Loading class names from: {class_map_path}")
+        with open(class_map_path, newline='') as f:
+            yamnet_class_names = [row["display_name"] for row in csv.DictReader(f)]
+    except Exception as e:
+        logger.error(f"Error loading class names: {str(e)}")
 
 # Audio processing settings
 SAMPLE_RATE = 16000  # Hz
@@ -214,84 +632,221 @@ CHUNK_DURATION = 3  # seconds
 CHANNELS = 2  # Stereo for spatial audio
 DTYPE = 'float32'
 
+SILENCE_RMS_THRESHOLD = 0.005  # Chunks quieter than this (RMS) skip sound identification
+SPEECH_QUEUE_MAXSIZE = 4  # Chunks waiting for speech recognition before new ones are skipped
+AUDIO_CHUNK_FRAMES = int(SAMPLE_RATE * CHUNK_DURATION)  # Frames per microphone read
+# Input latency requested from the audio device; the device buffers this much audio
+# while a chunk is being processed, so keep it above the chunk duration
+AUDIO_INPUT_LATENCY = 2 * CHUNK_DURATION  # seconds
+
 # Initialize speech recognition
 recognizer = sr.Recognizer()
 recognizer.energy_threshold = 1000  # Reduced from 4000 to be more sensitive
 recognizer.dynamic_energy_threshold = True
 recognizer.pause_threshold = 0.8
 
-# Initialize audio queue
-audio_queue = queue.Queue()
+# Audio chunks waiting for speech recognition
+speech_queue = queue.Queue(maxsize=SPEECH_QUEUE_MAXSIZE)
+
+# Event loop running all Gemini calls (started on first use)
+gemini_loop = None
+gemini_loop_lock = threading.Lock()
+
+# One slot per in-flight Gemini call, released when the call finishes
+gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENT)
+
+class GeminiBusyError(RuntimeError):
+    """Raised when GEMINI_MAX_CONCURRENT Gemini calls are already in flight"""
+
+def acquire_gemini_slot():
+    """
+    Take a Gemini slot without waiting; the caller must release it when its call ends
+    
+    Raises:
+        GeminiBusyError: If too many Gemini calls are already in flight
+    """
+    if not gemini_slots.acquire(blocking=False):
+        raise GeminiBusyError(f"Too many Gemini requests in flight (maximum {GEMINI_MAX_CONCURRENT})")
+
+# Cache of Gemini emotion analyses keyed by normalized text
+emotion_cache = LRUCache(maxsize=EMOTION_CACHE_SIZE)
+emotion_cache_lock = threading.Lock()
 
-# Global audio level history
-audio_level_history = [random.random() * 0.1 for _ in range(20)]  # Start with some random data
+# Recent /api/chat replies keyed by the full prompt (message plus emotional context)
+chat_reply_cache = TTLCache(maxsize=CHAT_CACHE_SIZE, ttl=CHAT_CACHE_TTL)
+chat_reply_cache_lock = threading.Lock()
+emotion_cache_stats = {"hits": 0, "misses": 0}
+
+# Texts waiting for batched emotion analysis, as (text, future) pairs
+pending_emotion_queue = []
+pending_emotion_condition = threading.Condition()
+emotion_batch_worker_started = False
+
+# Global audio level history (the deque drops the oldest level once full)
 MAX_AUDIO_HISTORY = 20
+audio_level_history = deque(
+    [demo_rng.random() * 0.1 for _ in range(MAX_AUDIO_HISTORY)],  # Start with some random data
+    maxlen=MAX_AUDIO_HISTORY
+)
+# Notified whenever a level is added; audio_level_count counts every level ever added
+audio_level_condition = threading.Condition()
+audio_level_count = 0
+AUDIO_LEVEL_STREAM_KEEPALIVE = 15  # seconds between keep-alive comments on an idle level stream
+AUDIO_LEVEL_STREAM_MAX_AGE = 300  # seconds before a level stream ends and the client's EventSource reconnects
+
+# Each open audio level or camera stream holds one of the worker's threads
+# (16 under gunicorn), so only a few may be open at once
+STREAM_MAX_CONCURRENT = 4
+stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONCURRENT)
 
 # Latest spectral analysis
 latest_spectral_analysis = None
 
 # Flag to control audio processing thread
 is_processing_audio = False
+# Set whenever the audio processing thread isn't running (so stop requests can wait for it)
+audio_stopped_event = threading.Event()
+audio_stopped_event.set()
+# Start requests for the audio supervisor thread, the only thread that runs microphone processing
+audio_command_queue = queue.SimpleQueue()
+# Set (under audio_start_lock) from a start request until the run it started ends
+audio_start_pending = False
+audio_start_lock = threading.Lock()
 # Flag to enable demo/test mode (generating fake data)
 demo_mode = False
-# Last time we restarted the audio processing
-last_restart_time = 0
+# Last time we restarted the audio processing (time.monotonic(), None until the first start)
+last_restart_time = None
+RESTART_COOLDOWN = 2  # seconds required between processing restarts
+restart_lock = threading.Lock()
 # Flag for demo processing
 is_demo_processing = False
 
 # Initialize webcam variables
 webcam = None
 last_frame = None
+last_frame_index = 0  # Bumped for every captured frame
+# Latest frame's JPEG encoding per quality, as {quality: (frame index, JPEG bytes)}, so
+# snapshots, streams and analyses share one encode per captured frame. Bounded because
+# snapshot clients choose the quality.
+FRAME_JPEG_CACHE_SIZE = 4
+frame_jpeg_cache = LRUCache(maxsize=FRAME_JPEG_CACHE_SIZE)
+frame_jpeg_cache_lock = threading.Lock()
 is_capturing_video = False
-frame_buffer = []
 MAX_BUFFER_SIZE = 5
-
-def detect_sound_direction(left_channel, right_channel):
+frame_buffer = deque(maxlen=MAX_BUFFER_SIZE)  # Recent frames (the deque drops the oldest)
+# Frames are captured into a fixed pool of reused arrays: every buffered frame plus the
+# latest one being encoded and the one being written
+FRAME_POOL_SIZE = MAX_BUFFER_SIZE + 2
+
+def get_gemini_loop():
+    """Get the event loop used for Gemini calls, starting its thread on first use"""
+    global gemini_loop
+    
+    with gemini_loop_lock:
+        if gemini_loop is None:
+            gemini_loop = asyncio.new_event_loop()
+            threading.Thread(target=gemini_loop.run_forever, daemon=True).start()
+            logger.info("Started Gemini event loop")
+        return gemini_loop
+
+def submit_gemini_generation(contents, gemini_model=None):
     """
-    Detect the direction of a sound based on stereo channel data.
+    Start generating content with Gemini's async API on the shared event loop
+    
+    Calls overlap on one event loop instead of each holding a synchronous
+    connection, and each gives up after GEMINI_TIMEOUT seconds. When Gemini
+    slows down, calls beyond GEMINI_MAX_CONCURRENT fail fast instead of
+    piling up.
     
     Args:
-        left_channel: Numpy array of left channel audio data
-        right_channel: Numpy array of right channel audio data
+        contents: Prompt string or list of prompt parts
+        gemini_model: Model to use (defaults to the main Gemini model)
         
     Returns:
-        Direction information as a dict with angle and text description
+        concurrent.futures.Future resolved with the Gemini response object
+        
+    Raises:
+        GeminiBusyError: If too many Gemini calls are already in flight
     """
+    gemini_model = gemini_model or model
+    acquire_gemini_slot()
+    
     try:
-        # Calculate energy in each channel
-        left_energy = np.mean(np.abs(left_channel))
-        right_energy = np.mean(np.abs(right_channel))
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(gemini_model.generate_content_async(contents), GEMINI_TIMEOUT),
+            get_gemini_loop()
+        )
+    except Exception:
+        gemini_slots.release()
+        raise
+    # Hold the slot until the call itself ends, even if the caller stops waiting
+    future.add_done_callback(lambda _: gemini_slots.release())
+    return future
+
+def generate_with_gemini(contents, gemini_model=None):
+    """
+    Generate content with Gemini, blocking until the response arrives
+    
+    Args:
+        contents: Prompt string or list of prompt parts
+        gemini_model: Model to use (defaults to the main Gemini model)
+        
+    Returns:
+        Gemini response object
         
-        # Add small epsilon to avoid division by zero
-        epsilon = 1e-10
+    Raises:
+        GeminiBusyError: If too many Gemini calls are already in flight
+        TimeoutError: If Gemini doesn't respond within GEMINI_TIMEOUT seconds
+    """
+    future = submit_gemini_generation(contents, gemini_model)
+    try:
+        return future.result(timeout=GEMINI_TIMEOUT)
+    except (concurrent.futures.TimeoutError, asyncio.TimeoutError):
+        future.cancel()
+        raise TimeoutError(f"Gemini did not respond within {GEMINI_TIMEOUT} seconds")
+
+def detect_sound_direction(left_energy, right_energy):
+    """
+    Detect the direction of a sound based on stereo channel energies.
+    
+    Args:
+        left_energy: RMS amplitude of the left channel
+        right_energy: RMS amplitude of the right channel
         
-        # Calculate ratio between channels
-        ratio = left_energy / (right_energy + epsilon)
+    Returns:
+        Direction information as a dict with angle and text description
+    """
+    try:
+        # Normalized channel balance in [-1, 1]: positive when the left channel is louder
+        # (small epsilon avoids division by zero)
+        balance = (left_energy - right_energy) / (left_energy + right_energy + 1e-10)
+        imbalance = abs(balance)
         
-        # Log the ratio for debugging
-        logger.debug(f"Direction detection - left energy: {left_energy}, right energy: {right_energy}, ratio: {ratio}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Direction detection - left energy: {left_energy}, right energy: {right_energy}, balance: {balance}")
         
-        # Calculate approximate angle
-        if ratio > 1.1:  # Left is louder (reduced threshold from >1)
+        # Calculate approximate angle (a balance of 0.05 is a channel ratio of about 1.1)
+        if imbalance < 0.05:
+            # Sound from center
+            angle = 0.0
+            direction = "center"
+        elif balance > 0:
             # Sound more from left side
-            angle = 270 - min(90, (ratio - 1) * 45)
+            angle = 270 - min(90.0, imbalance * 90)
             direction = "left"
-        elif ratio < 0.9:  # Right is louder (increased threshold from <1)
+        else:
             # Sound more from right side
-            angle = 90 - min(90, (1/ratio - 1) * 45)
+            angle = 90 - min(90.0, imbalance * 90)
             direction = "right"
-        else:
-            # Sound from center
-            angle = 0
-            direction = "center"
             
         result = {
             "angle": float(angle),
             "direction": direction,
-            "confidence": min(1.0, abs(1 - ratio) * 2)
+            "confidence": min(1.0, imbalance * 4)
         }
         
-        logger.debug(f"Direction detection result: {result}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Direction detection result: {result}")
         return result
     except Exception as e:
         logger.error(f"Error in direction detection: {str(e)}")
@@ -335,28 +890,32 @@ def stop_webcam_capture():
 
 # Thread for capturing webcam frames with optimized performance
 def webcam_capture_thread():
-    global webcam, last_frame, is_capturing_video, frame_buffer
+    global webcam, last_frame, last_frame_index, is_capturing_video
     last_capture_time = time.time()
     frames_captured = 0
+    # Arrays are allocated by the first read into each slot, then reused
+    frame_pool = [None] * FRAME_POOL_SIZE
     
     while is_capturing_video and webcam is not None:
         try:
-            ret, frame = webcam.read()
+            slot = last_frame_index % FRAME_POOL_SIZE
+            ret, frame = webcam.read(image=frame_pool[slot])
             if ret:
+                frame_pool[slot] = frame
+                
                 # Keep a small buffer of recent frames
                 frame_buffer.append(frame)
-                if len(frame_buffer) > MAX_BUFFER_SIZE:
-                    frame_buffer.pop(0)
                 
                 # The most recent frame for snapshot requests
                 last_frame = frame
+                last_frame_index += 1
                 
                 # Calculate actual FPS
                 frames_captured += 1
                 current_time = time.time()
                 if current_time - last_capture_time >= 5:  # Log FPS every 5 seconds
                     fps = frames_captured / (current_time - last_capture_time)
-                    logger.debug(f"Camera capture FPS: {fps:.2f}")
+                    logger.debug("Camera capture FPS: %.2f", fps)
                     frames_captured = 0
                     last_capture_time = current_time
             else:
@@ -368,33 +927,53 @@ def webcam_capture_thread():
             time.sleep(0.5)  # Sleep on error to prevent high CPU usage
 
 # Function to get the latest webcam frame as base64 with optimized encoding
-def get_latest_frame_base64(quality=70):
-    global last_frame
-    if last_frame is None:
+def get_latest_frame_jpeg(quality=70):
+    """Encode the latest webcam frame as JPEG bytes (None if there is no frame)"""
+    frame, frame_index = last_frame, last_frame_index
+    if frame is None:
         return None
     
+    # Reuse the encoding if this frame was already encoded at this quality
+    with frame_jpeg_cache_lock:
+        cached_index, cached_jpeg = frame_jpeg_cache.get(quality, (None, None))
+    if cached_index == frame_index:
+        return cached_jpeg
+    
     try:
         # Use lower quality JPEG encoding for faster transfer
         encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
-        _, buffer = cv2.imencode('.jpg', last_frame, encode_params)
-        return base64.b64encode(buffer).decode('utf-8')
+        _, buffer = cv2.imencode('.jpg', frame, encode_params)
+        image_jpeg = buffer.tobytes()
+        with frame_jpeg_cache_lock:
+            frame_jpeg_cache[quality] = (frame_index, image_jpeg)
+        return image_jpeg
     except Exception as e:
         logger.error(f"Error encoding webcam frame: {str(e)}")
         return None
 
-def analyze_multimodal_with_gemini(audio_text, image_base64=None, sound_classes=None, direction_data=None, emotion_data=None):
+def get_latest_frame_base64(quality=70):
+    """Encode the latest webcam frame as base64 JPEG text, for JSON responses"""
+    image_jpeg = get_latest_frame_jpeg(quality)
+    if image_jpeg is None:
+        return None
+    return base64.b64encode(image_jpeg).decode('ascii')
+
+def analyze_multimodal_with_gemini(audio_text, image_jpeg=None, sound_classes=None, direction_data=None, emotion_data=None):
     """
     Perform multimodal analysis using Gemini with both audio transcription and visual data
     
     Args:
         audio_text: Transcribed audio text
-        image_base64: Base64 encoded image data
+        image_jpeg: JPEG encoded image bytes
         sound_classes: Detected sound classes
         direction_data: Sound direction information
         emotion_data: Detected emotions
         
     Returns:
         Dict with multimodal analysis results
+        
+    Raises:
+        GeminiBusyError: If too many Gemini calls are already in flight
     """
     if not model:
         return {
@@ -419,51 +998,38 @@ def analyze_multimodal_with_gemini(audio_text, image_base64=None, sound_classes=
         if emotion_data:
             emotion_text = f"Detected emotion: {emotion_data.get('emotion', 'neutral')} (confidence: {emotion_data.get('confidence', 0):.2f})"
         
-        # Create parts for the prompt
-        parts = [
-            "You are EchoLens.AI, an advanced audio environment analyzer for deaf and hard-of-hearing users.",
-            "Your task is to analyze both visual and audio information to provide a complete understanding of what's happening.",
-            "Provide context, identify potential audio events that might be occurring based on the image, and explain the relationship between what's seen and heard.",
-            "\nInformation available:"
-        ]
-        
-        if audio_text:
-            parts.append(f"\nTranscribed speech: \"{audio_text}\"")
-        
-        parts.append(f"\n{sound_text}")
-        parts.append(f"\n{direction_text}")
-        parts.append(f"\n{emotion_text}")
-        
-        # Add any additional contextual instructions
-        parts.append("\nProvide the following in your response:")
-        parts.append("1. A brief description of what's happening (combining visual and audio information)")
-        parts.append("2. Important sounds that might be present in this environment even if not detected")
-        parts.append("3. Any safety concerns or important information for a deaf or hard-of-hearing user")
-        parts.append("\nFormat the response in a clear, concise way. Keep the entire response under 150 words.")
-        
-        # Create prompt using all text parts
-        prompt = "\n".join(parts)
+        # Fill in the prebuilt prompt
+        speech_text = f"\nTranscribed speech: \"{audio_text}\"\n" if audio_text else ""
+        prompt = MULTIMODAL_ANALYSIS_PROMPT_TEMPLATE.format(
+            speech_text=speech_text,
+            sound_text=sound_text,
+            direction_text=direction_text,
+            emotion_text=emotion_text
+        )
         
         # If we have an image, create multimodal content
-        if image_base64:
-            response = model.generate_content(
+        if image_jpeg:
+            response = generate_with_gemini(
                 [
                     prompt,
                     {
                         "mime_type": "image/jpeg",
-                        "data": base64.b64decode(image_base64)
+                        "data": image_jpeg
                     }
                 ]
             )
         else:
             # Text-only analysis
-            response = model.generate_content(prompt)
+            response = generate_with_gemini(prompt)
         
         # Return the analysis result
         return {
             "analysis": response.text,
             "timestamp": datetime.now().isoformat()
         }
+    except GeminiBusyError:
+        # Let the endpoint answer 503 instead of returning the error as an analysis
+        raise
     except Exception as e:
         logger.error(f"Error in multimodal analysis: {str(e)}")
         return {
@@ -471,88 +1037,134 @@ def analyze_multimodal_with_gemini(audio_text, image_base64=None, sound_classes=
             "timestamp": datetime.now().isoformat()
         }
 
-def analyze_emotion_with_gemini(text, image_base64=None):
+def parse_gemini_json(response_text):
     """
-    Analyze the emotional content of text and optional image using Gemini API
+    Parse a JSON payload from a Gemini response
     
     Args:
-        text: The text to analyze
-        image_base64: Optional base64 encoded image for multimodal analysis
+        response_text: Raw response text, optionally wrapped in markdown code blocks
         
     Returns:
-        Dict with emotion analysis
+        Parsed JSON object
     """
-    if not model or not text:
-        # If model is not available, provide a basic fallback emotion analysis
-        emotion_analysis = provide_fallback_emotion_analysis(text)
-        logger.info(f"Using fallback emotion analysis for: '{text[:30]}...'")
-        return emotion_analysis
+    # Schema-constrained responses are bare JSON: parse them without running the regex
+    if "```" not in response_text:
+        return orjson.loads(response_text)
     
-    try:
-        # If we have both text and image, perform multimodal emotion analysis
-        if image_base64:
-            prompt = f"""
-            Analyze the emotional tone of this person based on both their text and facial expression.
-            Focus on detecting emotions like happy, excited, sad, angry, surprised, confused, frustrated, neutral, concerned, or sarcastic.
-            
-            Consider both the facial expression in the image AND the text content.
-            
-            Text to analyze: "{text}"
-            
-            Respond in JSON format with the following fields:
-            - emotion: The primary emotion (happy, excited, sad, angry, surprised, confused, frustrated, neutral, concerned, sarcastic)
-            - confidence: A number between 0 and 1 indicating confidence
-            - intensity: A number between 0 and 1 indicating intensity
-            - visual_cues: Brief description of visual emotional cues observed in the image
-            - text_cues: Brief description of emotional cues in the text
-            - explanation: Short explanation considering both visual and textual information
-            
-            JSON response:
-            """
-            
-            response = model.generate_content(
-                [
-                    prompt,
-                    {
-                        "mime_type": "image/jpeg", 
-                        "data": base64.b64decode(image_base64)
-                    }
-                ]
-            )
-        else:
-            # Text-only emotion analysis
-            prompt = f"""
-            Analyze the emotional tone of this text. Respond in JSON format with the following fields:
-            - emotion: The primary emotion (happy, excited, sad, angry, surprised, confused, frustrated, neutral, concerned, sarcastic)
-            - confidence: A number between 0 and 1 indicating confidence
-            - intensity: A number between 0 and 1 indicating intensity
-            - explanation: Short explanation of why you detected this emotion
-            
-            Text to analyze: "{text}"
-            
-            JSON response:
-            """
-            
-            response = model.generate_content(prompt)
+    # Extract JSON if it's wrapped in markdown code blocks
+    match = GEMINI_JSON_BLOCK_RE.search(response_text)
+    json_str = match.group(1) if match else response_text
+    
+    return orjson.loads(json_str)
+
+def analyze_emotions_batch_with_gemini(texts):
+    """
+    Analyze the emotional content of several texts with a single Gemini call
+    
+    Returns at once: the call runs on the Gemini event loop, so several
+    batches can be in flight together.
+    
+    Args:
+        texts: List of texts to analyze
         
+    Returns:
+        concurrent.futures.Future resolved with a list of emotion analysis dicts,
+        in the same order as texts
+    """
+    analyses_future = concurrent.futures.Future()
+    if not model or not texts:
+        analyses_future.set_result([provide_fallback_emotion_analysis(text) for text in texts])
+        return analyses_future
+    
+    # Only send texts that aren't already cached (each text's lookup was
+    # already counted when it was queued, so these rechecks aren't)
+    analyses = [get_cached_emotion(text, count=False) for text in texts]
+    uncached_texts = [text for text, analysis in zip(texts, analyses) if analysis is None]
+    if not uncached_texts:
+        analyses_future.set_result(analyses)
+        return analyses_future
+    
+    def fill_in_analyses(analyses_by_id):
+        # Fill in the newly analyzed texts in their original positions
+        uncached_results = iter(
+            analyses_by_id.get(i) or provide_fallback_emotion_analysis(text)
+            for i, text in enumerate(uncached_texts, 1)
+        )
+        analyses_future.set_result(
+            [analysis if analysis is not None else next(uncached_results) for analysis in analyses]
+        )
+    
+    def on_response(response_future):
         try:
-            # Parse JSON from response
-            json_str = response.text
-            # Extract JSON if it's wrapped in markdown code blocks
-            if "```json" in json_str:
-                json_str = json_str.split("```json")[1].split("```")[0].strip()
-            elif "```" in json_str:
-                json_str = json_str.split("```")[1].split("```")[0].strip()
-                
-            analysis = json.loads(json_str)
-            return analysis
+            results = parse_gemini_json(response_future.result().text)
+            
+            # Map results back to their lines by id
+            analyses_by_id = {}
+            for result in results:
+                if not isinstance(result, dict):
+                    continue
+                try:
+                    # The id only matches results to lines; it isn't part of the analysis
+                    analyses_by_id[int(result.pop("id", None))] = result
+                except (TypeError, ValueError):
+                    continue
+            
+            for i, text in enumerate(uncached_texts, 1):
+                if i in analyses_by_id:
+                    cache_emotion(text, analyses_by_id[i])
         except Exception as e:
-            logger.error(f"Error parsing emotion analysis JSON: {str(e)}")
-            # Fallback to simple extraction
-            return provide_fallback_emotion_analysis(text)
+            logger.error(f"Error in batch emotion analysis: {str(e)}")
+            analyses_by_id = {}
+        fill_in_analyses(analyses_by_id)
+    
+    try:
+        numbered_lines = "\n".join(f"{i}) {text}" for i, text in enumerate(uncached_texts, 1))
+        prompt = BATCH_EMOTION_PROMPT_TEMPLATE.format(lines=numbered_lines)
+        submit_gemini_generation(prompt, batch_emotion_model).add_done_callback(on_response)
     except Exception as e:
-        logger.error(f"Error in emotion analysis: {str(e)}")
-        return provide_fallback_emotion_analysis(text)
+        logger.error(f"Error in batch emotion analysis: {str(e)}")
+        fill_in_analyses({})
+    return analyses_future
+
+def emotion_cache_key(text):
+    """Normalize text so trivially different inputs share a cache entry"""
+    return text.strip().lower()
+
+def get_cached_emotion(text, count=True):
+    """
+    Get a cached emotion analysis for text, or None if it hasn't been analyzed
+    
+    Args:
+        text: The analyzed text
+        count: Whether to record the lookup in the cache hit/miss stats
+    """
+    with emotion_cache_lock:
+        analysis = emotion_cache.get(emotion_cache_key(text))
+        if count:
+            emotion_cache_stats["hits" if analysis is not None else "misses"] += 1
+    # Return a copy so callers can't modify the cached entry
+    return dict(analysis) if analysis is not None else None
+
+def get_emotion_cache_stats():
+    """Get the size and hit rate of the emotion analysis cache"""
+    with emotion_cache_lock:
+        hits = emotion_cache_stats["hits"]
+        misses = emotion_cache_stats["misses"]
+        size = len(emotion_cache)
+    lookups = hits + misses
+    return {
+        "size": size,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0
+    }
+
+def cache_emotion(text, analysis):
+    """Cache a Gemini emotion analysis for text"""
+    if not isinstance(analysis, dict):
+        return
+    with emotion_cache_lock:
+        emotion_cache[emotion_cache_key(text)] = dict(analysis)
 
 def provide_fallback_emotion_analysis(text):
     """
@@ -567,25 +1179,14 @@ def provide_fallback_emotion_analysis(text):
     # Simple keyword-based emotion detection
     text = text.lower()
     
-    # Define emotion keywords
-    emotion_keywords = {
-        "happy": ["happy", "joy", "glad", "excellent", "great", "wonderful", "love", "yay", "smile"],
-        "excited": ["excited", "amazing", "wow", "awesome", "incredible", "thrilled"],
-        "sad": ["sad", "sorry", "unfortunate", "miss", "regret", "disappoint", "cry"],
-        "angry": ["angry", "mad", "frustrat", "annoyed", "hate", "upset", "furious"],
-        "surprised": ["surprise", "shock", "unexpected", "woah", "whoa", "oh my"],
-        "confused": ["confused", "unclear", "don't understand", "what?", "huh?", "lost"],
-        "neutral": ["okay", "fine", "alright", "so", "and", "the", "a"]
-    }
+    # Find every keyword present (each counts once), then count them per emotion
+    found_keywords = set()
+    for keyword in FALLBACK_KEYWORD_RE.findall(text):
+        found_keywords.update(FALLBACK_KEYWORD_PREFIXES[keyword])
     
-    # Count emotion keywords
-    emotion_scores = {}
-    for emotion, keywords in emotion_keywords.items():
-        score = 0
-        for keyword in keywords:
-            if keyword in text:
-                score += 1
-        emotion_scores[emotion] = score
+    emotion_scores = dict.fromkeys(FALLBACK_EMOTION_KEYWORDS, 0)
+    for keyword in found_keywords:
+        emotion_scores[FALLBACK_KEYWORD_EMOTIONS[keyword]] += 1
     
     # Default to neutral if no emotions detected
     if all(score == 0 for score in emotion_scores.values()):
@@ -607,6 +1208,75 @@ def provide_fallback_emotion_analysis(text):
         "source": "fallback"  # Indicate this is from fallback analysis
     }
 
+def run_yamnet(waveform):
+    """
+    Run YAMNet on a mono float32 waveform, preferring the XLA-compiled function
+    
+    Args:
+        waveform: Mono float32 numpy array sampled at 16 kHz
+        
+    Returns:
+        Tuple of (scores, embeddings, log_mel_spectrogram) tensors
+    """
+    global yamnet_infer
+    
+    if yamnet_infer is not None:
+        try:
+            return yamnet_infer(waveform)
+        except Exception as e:
+            logger.error(f"Compiled YAMNet inference failed, using the SavedModel directly: {str(e)}")
+            yamnet_infer = None
+    
+    return yamnet_model(waveform)
+
+def run_yamnet_tflite(waveform):
+    """
+    Run the TFLite YAMNet classifier over 0.975 s windows of a mono float32 waveform
+    
+    Args:
+        waveform: Mono float32 numpy array sampled at 16 kHz
+        
+    Returns:
+        Numpy array of class scores averaged over all windows
+    """
+    # Pad short audio to one window, then slide with the SavedModel's hop
+    if len(waveform) < YAMNET_FRAME_SAMPLES:
+        waveform = np.pad(waveform, (0, YAMNET_FRAME_SAMPLES - len(waveform)))
+    starts = range(0, len(waveform) - YAMNET_FRAME_SAMPLES + 1, YAMNET_HOP_SAMPLES)
+    
+    with yamnet_tflite_lock:
+        input_details = yamnet_tflite.get_input_details()[0]
+        output_details = yamnet_tflite.get_output_details()[0]
+        input_scale, input_zero_point = input_details["quantization"]
+        output_scale, output_zero_point = output_details["quantization"]
+        
+        score_sum = None
+        for start in starts:
+            frame = waveform[start:start + YAMNET_FRAME_SAMPLES]
+            if input_scale:
+                # Quantized input: map the float waveform onto the integer input range
+                frame = np.round(frame / input_scale + input_zero_point).astype(input_details["dtype"])
+            yamnet_tflite.set_tensor(input_details["index"], frame)
+            yamnet_tflite.invoke()
+            scores = yamnet_tflite.get_tensor(output_details["index"]).reshape(-1).astype(np.float32)
+            if output_scale:
+                scores = (scores - output_zero_point) * output_scale
+            score_sum = scores if score_sum is None else score_sum + scores
+    
+    return score_sum / len(starts)
+
+def warm_up_yamnet():
+    """Run YAMNet once on a silent chunk so compilation and kernel selection happen before real audio arrives"""
+    if yamnet_model is None:
+        return
+    
+    try:
+        start_time = time.time()
+        identify_sounds_with_yamnet(np.zeros(AUDIO_CHUNK_FRAMES, dtype=np.float32))
+        logger.info(f"YAMNet warm-up finished in {time.time() - start_time:.2f}s")
+    except Exception as e:
+        logger.error(f"YAMNet warm-up failed: {str(e)}")
+
 def identify_sounds_with_yamnet(audio_data):
     """
     Identify sounds in audio data using YAMNet model
@@ -621,53 +1291,32 @@ def identify_sounds_with_yamnet(audio_data):
         return []
     
     try:
-        # Store original stereo data for direction detection
-        stereo_data = audio_data.copy() if len(audio_data.shape) > 1 and audio_data.shape[1] > 1 else None
+        # Ensure audio is mono for YAMNet (callers normally pass mono already, which skips this)
+        if audio_data.ndim > 1:
+            audio_data = downmix_to_mono(audio_data)
         
-        # Ensure audio is mono and correct sample rate (16kHz) for YAMNet
-        if len(audio_data.shape) > 1 and audio_data.shape[1] > 1:
-            # Convert stereo to mono by averaging channels
-            audio_data = np.mean(audio_data, axis=1)
+        # Ensure correct dtype (without copying audio that is already float32)
+        audio_data = audio_data.astype(np.float32, copy=False)
         
-        # Ensure correct dtype
-        audio_data = audio_data.astype(np.float32)
+        # Run inference, averaging class scores over frames once
+        if yamnet_tflite is not None:
+            mean_scores = run_yamnet_tflite(audio_data)
+        else:
+            scores, embeddings, log_mel_spectrogram = run_yamnet(audio_data)
+            mean_scores = scores.numpy().mean(axis=0)
         
-        # Run inference
-        scores, embeddings, log_mel_spectrogram = yamnet_model(audio_data)
+        class_names = yamnet_class_names
         
-        # Try to get the class map path 
-        try:
-            # Get the path to the class map CSV file
-            class_map_path = yamnet_model.class_map_path().numpy().decode('utf-8')
-            logger.info(f"Loading class names from: {class_map_path}")
-            
-            # Load class names from the CSV file
-            class_names = []
-            with open(class_map_path) as f:
-                for row in f:
-                    parts = row.strip().split(',')
-                    if len(parts) >= 1:
-                        # Format the class name to be more readable
-                        class_name = parts[0].strip().replace('_', ' ').title()
-                        class_names.append(class_name)
-        except Exception as e:
-            logger.error(f"Error loading class names: {str(e)}")
-            # Fallback class names
-            class_names = [
-                "Speech", "Music", "Dog", "Cat", "Bird", "Vehicle", "Alarm", 
-                "Doorbell", "Phone", "Water", "Wind", "Footsteps", "Knock",
-                "Typing", "Applause", "Baby Crying", "Siren", "Clock", "Bell"
-            ] + [f"Sound_{i}" for i in range(512)]  # Add fallback for index overflows
-        
-        # Get top 5 predictions
-        top_indices = np.argsort(scores.numpy().mean(axis=0))[-5:][::-1]
+        # Get top 5 predictions (partition first, then sort only those 5)
+        top_indices = np.argpartition(mean_scores, -5)[-5:]
+        top_indices = top_indices[np.argsort(-mean_scores[top_indices])]
         detected_sounds = []
         
         # Make sure we don't access an index that doesn't exist in class_names
         for i in top_indices:
             if i < len(class_names):
                 sound_name = class_names[i]
-                confidence = float(scores.numpy().mean(axis=0)[i])
+                confidence = float(mean_scores[i])
                 
                 if confidence > 0.1:  # Only include sounds with reasonable confidence
                     detected_sounds.append({
@@ -682,26 +1331,99 @@ def identify_sounds_with_yamnet(audio_data):
         logger.error(f"Error in sound identification: {str(e)}")
         return []
 
+def add_mock_db_record(collection, record):
+    """
+    Queue a record for an in-memory collection, assigning it a unique id
+    
+    The record is moved into mock_db by the ingest thread, so producers never
+    wait on mock_db_lock.
+    
+    Args:
+        collection: Name of the mock_db collection ("transcriptions" or "sound_alerts")
+        record: Dict to store
+        
+    Returns:
+        The queued record
+    """
+    add_mock_db_records(collection, [record])
+    return record
+
+def add_mock_db_records(collection, records):
+    """
+    Queue several records for an in-memory collection as one ingest item
+    
+    Args:
+        collection: Name of the mock_db collection ("transcriptions" or "sound_alerts")
+        records: List of dicts to store
+        
+    Returns:
+        The queued records
+    """
+    id_counter = record_id_counters[collection]
+    for record in records:
+        record["id"] = next(id_counter)
+    record_ingest_queue.put((collection, records))
+    return records
+
+def record_ingest_thread():
+    """Thread that moves queued records into mock_db, one lock acquisition per batch"""
+    while True:
+        # Block until a record arrives, then take everything else already queued
+        batch = [record_ingest_queue.get()]
+        try:
+            while True:
+                batch.append(record_ingest_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        records_by_collection = {}
+        for collection, records in batch:
+            records_by_collection.setdefault(collection, []).extend(records)
+        
+        with mock_db_lock:
+            for collection, records in records_by_collection.items():
+                mock_db[collection].extend(records)
+                mock_db_versions[collection] += 1
+
+def queue_db_write(collection, fields):
+    """
+    Queue a document for the next bulk write to MongoDB, so the caller never waits on the database
+    
+    Args:
+        collection: "transcriptions" or "sound_alerts"
+        fields: Dict of arguments for save_transcriptions / save_detected_sounds
+    """
+    db_write_queue.put((collection, fields))
+
+def db_write_thread():
+    """Thread that writes queued documents to MongoDB with one insert_many per collection and batch"""
+    while True:
+        # Block until a document arrives, then give others a moment to join the batch
+        batch = [db_write_queue.get()]
+        time.sleep(DB_WRITE_INTERVAL)
+        try:
+            while True:
+                batch.append(db_write_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        documents_by_collection = {}
+        for collection, fields in batch:
+            documents_by_collection.setdefault(collection, []).append(fields)
+        
+        for collection, documents in documents_by_collection.items():
+            for start in range(0, len(documents), DB_WRITE_BATCH_SIZE):
+                try:
+                    DB_BULK_SAVERS[collection](documents[start:start + DB_WRITE_BATCH_SIZE])
+                except Exception as e:
+                    logger.error(f"Failed to save {collection} to database: {str(e)}")
+
 def generate_demo_transcription():
     """Generate a fake transcription for demo/testing purposes"""
-    phrase = random.choice(demo_phrases)
-    emotion = random.choice(detectable_emotions)
-    confidence = random.random() * 0.5 + 0.5  # 0.5-1.0
-    intensity = random.random() * 0.5 + 0.5  # 0.5-1.0
-    
-    # Explanations based on emotions
-    explanations = {
-        "happy": "The text contains positive language and enthusiasm",
-        "excited": "The text shows high energy and enthusiasm",
-        "sad": "The text expresses regret or disappointment",
-        "angry": "The text contains forceful language and frustration",
-        "surprised": "The text indicates unexpected information",
-        "confused": "The text expresses uncertainty or lack of clarity",
-        "frustrated": "The text shows dissatisfaction and obstacles",
-        "neutral": "The text is factual without strong emotion",
-        "concerned": "The text shows worry about a situation",
-        "sarcastic": "The text has contradictory sentiment with implied meaning"
-    }
+    phrase = demo_rng.choice(demo_phrases)
+    emotion = DEMO_PHRASE_EMOTIONS[phrase]
+    confidence = demo_rng.random() * 0.5 + 0.5  # 0.5-1.0
+    intensity = demo_rng.random() * 0.5 + 0.5  # 0.5-1.0
     
     return {
         "timestamp": datetime.now().isoformat(),
@@ -709,45 +1431,119 @@ def generate_demo_transcription():
         "emotion": emotion,
         "emotion_confidence": confidence,
         "emotion_intensity": intensity,
-        "explanation": explanations.get(emotion, "Detected through language patterns")
+        "explanation": DEMO_EMOTION_EXPLANATIONS.get(emotion, "Detected through language patterns")
     }
 
 def generate_demo_sound_alert():
     """Generate a fake sound alert for demo/testing purposes"""
-    sound = random.choice(demo_sounds)
-    confidence = random.random() * 0.5 + 0.5  # 0.5-1.0
-    direction = random.choice(["left", "right", "center"])
+    sound = demo_rng.choice(demo_sounds)
+    confidence = demo_rng.random() * 0.5 + 0.5  # 0.5-1.0
+    direction = demo_rng.choice(DEMO_DIRECTIONS)
     
     # Generate angle based on direction
     if direction == "left":
-        angle = random.uniform(180, 270)
+        angle = demo_rng.uniform(180, 270)
     elif direction == "right":
-        angle = random.uniform(90, 0)
+        angle = demo_rng.uniform(90, 0)
     else:
-        angle = random.uniform(0, 360)
+        angle = demo_rng.uniform(0, 360)
+        
+    return build_sound_alert(sound, confidence, {"direction": direction, "angle": angle})
+
+def build_sound_alert(sound, confidence, direction_info, timestamp=None):
+    """
+    Build a sound alert record
+    
+    Args:
+        sound: Name of the detected sound
+        confidence: Detection confidence between 0 and 1
+        direction_info: Dict with "direction" and "angle" from detect_sound_direction
+        timestamp: ISO timestamp to use (defaults to now)
         
+    Returns:
+        Sound alert dict
+    """
     return {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": timestamp or datetime.now().isoformat(),
         "sound": sound,
         "confidence": confidence,
-        "direction": direction,
-        "angle": angle
+        "direction": direction_info["direction"],
+        "angle": direction_info["angle"]
     }
 
-def audio_callback(indata, frames, time, status):
-    """Callback for audio stream to put data in queue"""
-    if status:
-        logger.warning(f"Audio callback status: {status}")
-    audio_queue.put(indata.copy())
+def record_sound_alert(sound_alert):
+    """Store a sound alert in memory and in MongoDB if the database is initialized"""
+    return record_sound_alerts([sound_alert])[0]
+
+def record_sound_alerts(sound_alerts):
+    """Store sound alerts in memory as one batch and in MongoDB if the database is initialized"""
+    add_mock_db_records("sound_alerts", sound_alerts)
+    
+    if db_initialized:
+        for sound_alert in sound_alerts:
+            queue_db_write("sound_alerts", {
+                "sound": sound_alert["sound"],
+                "confidence": sound_alert["confidence"],
+                "direction": sound_alert["direction"],
+                "angle": sound_alert["angle"],
+                "timestamp": sound_alert["timestamp"]
+            })
+    
+    return sound_alerts
+
+def record_audio_level(audio_level):
+    """Add an audio level to the history and wake any level stream listeners"""
+    global audio_level_count
+    
+    with audio_level_condition:
+        audio_level_history.append(audio_level)
+        audio_level_count += 1
+        audio_level_condition.notify_all()
 
-def process_audio_chunk(use_demo_mode=None):
+def downmix_to_mono(audio_data):
+    """
+    Average the channels of (frames, channels) audio into a new mono float32 array
+    
+    Args:
+        audio_data: Numpy array of shape (frames, channels)
+        
+    Returns:
+        Mono numpy array of shape (frames,)
+    """
+    if audio_data.shape[1] == 2:
+        # Adding the two channel columns is much faster than a mean over a length-2 axis
+        mono_audio = audio_data[:, 0] + audio_data[:, 1]
+        mono_audio *= 0.5
+        return mono_audio
+    return audio_data.mean(axis=1, dtype=np.float32)
+
+def read_audio_chunk(stream):
+    """
+    Read the next chunk of microphone audio from a blocking input stream
+    
+    Args:
+        stream: Open sounddevice InputStream in blocking mode
+        
+    Returns:
+        Numpy array of shape (frames, channels) owned by the caller
+    """
+    # Take everything the device has buffered if processing fell behind,
+    # so the backlog is handled as a single chunk
+    frames = max(AUDIO_CHUNK_FRAMES, stream.read_available)
+    audio_data, overflowed = stream.read(frames)
+    if overflowed:
+        logger.warning("Audio processing is falling behind, microphone input overflowed")
+    return audio_data
+
+def process_audio_chunk(use_demo_mode=None, audio_data=None):
     """
     Process a chunk of audio data for transcription and sound detection
     
     Args:
         use_demo_mode: Override to explicitly use demo mode or not. If None, use global demo_mode.
+        audio_data: Microphone audio of shape (frames, channels), required outside demo mode
     """
-    global latest_spectral_analysis, audio_level_history
+    global latest_spectral_analysis
     
     # Determine whether to use demo mode
     is_demo = demo_mode if use_demo_mode is None else use_demo_mode
@@ -755,159 +1551,151 @@ def process_audio_chunk(use_demo_mode=None):
     try:
         if is_demo:
             # Generate random audio level for visualization
-            audio_level = abs(random.normalvariate(0, 0.05))
-            audio_level_history.append(float(audio_level))
-            if len(audio_level_history) > MAX_AUDIO_HISTORY:
-                audio_level_history = audio_level_history[-MAX_AUDIO_HISTORY:]
+            audio_level = abs(demo_rng.normalvariate(0, 0.05))
+            record_audio_level(float(audio_level))
             
             # Randomly generate transcription (20% chance each time)
-            if random.random() < 0.2 and mock_db["user_preferences"]["transcription_enabled"]:
+            if demo_rng.random() < 0.2 and mock_db["user_preferences"]["transcription_enabled"]:
                 transcription = generate_demo_transcription()
-                mock_db["transcriptions"].append(transcription)
-                logger.info(f"Demo transcription: {transcription['text']}")
+                add_mock_db_record("transcriptions", transcription)
+                logger.info("Demo transcription: %s", transcription["text"])
                 
                 # Store in MongoDB database if initialized
                 if db_initialized:
-                    try:
-                        save_transcription(
-                            text=transcription["text"],
-                            emotion=transcription["emotion"],
-                            source="demo"
-                        )
-                        logger.info(f"Saved demo transcription to database: {transcription['text'][:30]}...")
-                    except Exception as e:
-                        logger.error(f"Failed to save demo transcription to database: {str(e)}")
+                    queue_db_write("transcriptions", {
+                        "text": transcription["text"],
+                        "emotion": transcription["emotion"],
+                        "source": "demo",
+                        "timestamp": transcription["timestamp"]
+                    })
             
             # Randomly generate sound alert (15% chance each time)
-            if random.random() < 0.15 and mock_db["user_preferences"]["sound_detection_enabled"]:
-                sound_alert = generate_demo_sound_alert()
-                mock_db["sound_alerts"].append(sound_alert)
-                logger.info(f"Demo sound detected: {sound_alert['sound']} from {sound_alert['direction']}")
-                
-                # Store in MongoDB database if initialized
-                if db_initialized:
-                    try:
-                        save_detected_sound(
-                            sound=sound_alert["sound"],
-                            confidence=sound_alert["confidence"],
-                            direction=sound_alert["direction"],
-                            angle=sound_alert["angle"]
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to save demo sound alert to database: {str(e)}")
+            if demo_rng.random() < 0.15 and mock_db["user_preferences"]["sound_detection_enabled"]:
+                sound_alert = record_sound_alert(generate_demo_sound_alert())
+                logger.info("Demo sound detected: %s from %s", sound_alert["sound"], sound_alert["direction"])
             
             return True
             
-        # Get audio data from queue
-        audio_data = audio_queue.get(block=False)
+        # Sum of squares per channel in one pass over the interleaved buffer (no temporaries);
+        # gives both the overall level and the per-channel energies for direction detection
+        channel_square_sums = np.einsum('ij,ij->j', audio_data, audio_data)
         
-        # Calculate audio level
-        audio_level = np.sqrt(np.mean(audio_data**2))
-        audio_level_history.append(float(audio_level))
-        if len(audio_level_history) > MAX_AUDIO_HISTORY:
-            audio_level_history = audio_level_history[-MAX_AUDIO_HISTORY:]
+        # Calculate audio level (RMS)
+        audio_level = np.sqrt(channel_square_sums.sum() / audio_data.size)
+        record_audio_level(float(audio_level))
         
         # Analyze direction
         direction_info = {"angle": 0, "direction": "center", "confidence": 0}
         if audio_data.shape[1] >= 2:  # Ensure we have stereo data
-            left_channel = audio_data[:, 0]
-            right_channel = audio_data[:, 1]
-            direction_info = detect_sound_direction(left_channel, right_channel)
-            logger.debug(f"Direction detected: {direction_info['direction']} at {direction_info['angle']}°")
-        
-        # Sound identification
-        if mock_db["user_preferences"]["sound_detection_enabled"]:
-            detected_sounds = identify_sounds_with_yamnet(audio_data)
+            channel_energy = np.sqrt(channel_square_sums / audio_data.shape[0])
+            direction_info = detect_sound_direction(float(channel_energy[0]), float(channel_energy[1]))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Direction detected: {direction_info['direction']} at {direction_info['angle']}°")
+        
+        # Downmix once for both YAMNet and speech recognition
+        mono_audio = downmix_to_mono(audio_data)
+        
+        # Sound identification (skipped for near-silent chunks, which can't produce an alert)
+        if mock_db["user_preferences"]["sound_detection_enabled"] and audio_level >= SILENCE_RMS_THRESHOLD:
+            detected_sounds = identify_sounds_with_yamnet(mono_audio)
             
             # Add any detected sounds to alerts, regardless of importance
             # This makes spatial audio more likely to be seen for testing
-            for sound in detected_sounds:
-                if sound["confidence"] > 0.3:  # Lowered threshold from 0.5
-                    sound_alert = {
-                        "timestamp": datetime.now().isoformat(),
-                        "sound": sound["sound"],
-                        "confidence": sound["confidence"],
-                        "direction": direction_info["direction"],
-                        "angle": direction_info["angle"]
-                    }
-                    mock_db["sound_alerts"].append(sound_alert)
-                    logger.info(f"Sound detected: {sound['sound']} from {direction_info['direction']}")
-                    
-                    # Store in MongoDB database if initialized
-                    if db_initialized:
-                        try:
-                            save_detected_sound(
-                                sound=sound["sound"], 
-                                confidence=sound["confidence"],
-                                direction=direction_info["direction"],
-                                angle=direction_info["angle"]
-                            )
-                        except Exception as e:
-                            logger.error(f"Failed to save detected sound to database: {str(e)}")
-        
-        # Speech recognition (in a separate thread to avoid blocking)
+            timestamp = datetime.now().isoformat()
+            sound_alerts = [
+                build_sound_alert(sound["sound"], sound["confidence"], direction_info, timestamp)
+                for sound in detected_sounds
+                if sound["confidence"] > 0.3  # Lowered threshold from 0.5
+            ]
+            if sound_alerts:
+                record_sound_alerts(sound_alerts)
+                logger.info("Sounds detected: %s from %s",
+                            [alert["sound"] for alert in sound_alerts], direction_info["direction"])
+        
+        # Speech recognition (handed to the speech recognition thread to avoid blocking)
         if (mock_db["user_preferences"]["transcription_enabled"] and 
             audio_level > recognizer.energy_threshold / 100000):  # Even lower threshold to capture more speech
-            threading.Thread(target=process_speech, args=(audio_data,)).start()
+            try:
+                # YAMNet is done with mono_audio, so the speech thread may modify it
+                speech_queue.put_nowait(mono_audio)
+            except queue.Full:
+                logger.warning("Speech recognition is falling behind, skipping an audio chunk")
         
         return True
-    except queue.Empty:
-        return False
     except Exception as e:
         logger.error(f"Error processing audio chunk: {str(e)}")
         return False
 
+def transcribe_with_whisper(mono_audio):
+    """
+    Transcribe mono float32 audio locally with the Whisper model
+    
+    Args:
+        mono_audio: Mono float32 numpy array sampled at SAMPLE_RATE
+        
+    Returns:
+        Transcribed text (empty if no speech was found)
+    """
+    segments, info = stt_model.transcribe(mono_audio, language="en", beam_size=1, vad_filter=True)
+    return " ".join(segment.text.strip() for segment in segments)
+
+def transcribe_with_google(mono_audio):
+    """
+    Transcribe mono float32 audio with Google Speech Recognition
+    
+    Args:
+        mono_audio: Mono float32 numpy array sampled at SAMPLE_RATE (modified in place)
+        
+    Returns:
+        Transcribed text
+    """
+    # AudioData expects signed integer PCM, so convert the float32 samples to 16-bit
+    # (mono_audio is already a fresh array, so clip and scale it in place)
+    np.clip(mono_audio, -1.0, 1.0, out=mono_audio)
+    mono_audio *= 32767
+    pcm_audio = mono_audio.astype(np.int16)
+    
+    # Create AudioData object
+    audio_data_obj = sr.AudioData(
+        pcm_audio.tobytes(),
+        sample_rate=SAMPLE_RATE,
+        sample_width=2  # int16 is 2 bytes
+    )
+    
+    return recognizer.recognize_google(audio_data_obj)
+
 def process_speech(audio_data):
-    """Process audio for speech recognition and emotion analysis"""
+    """Process audio (mono, or frames x channels) for speech recognition and emotion analysis"""
     try:
         # Convert to mono audio at the correct sample rate for speech recognition
-        if audio_data.shape[1] >= 2:
-            mono_audio = np.mean(audio_data, axis=1)
-        else:
-            mono_audio = audio_data.flatten()
-        
-        # Create AudioData object
-        audio_data_obj = sr.AudioData(
-            mono_audio.tobytes(),
-            sample_rate=SAMPLE_RATE,
-            sample_width=4  # float32 is 4 bytes
-        )
+        mono_audio = downmix_to_mono(audio_data) if audio_data.ndim > 1 else audio_data
         
         # Recognize speech
-        text = recognizer.recognize_google(audio_data_obj)
+        if stt_model is not None:
+            text = transcribe_with_whisper(mono_audio)
+        else:
+            text = transcribe_with_google(mono_audio)
         
         if text and len(text.strip()) > 0:
-            # Analyze emotion
-            emotion_analysis = {"emotion": "neutral", "confidence": 0}
-            if mock_db["user_preferences"]["emotion_detection_enabled"]:
-                emotion_analysis = analyze_emotion_with_gemini(text)
-            
-            # Store transcription
+            # Store transcription (emotion is filled in by the batch worker)
             transcription = {
                 "timestamp": datetime.now().isoformat(),
                 "text": text,
-                "emotion": emotion_analysis.get("emotion", "neutral"),
-                "emotion_confidence": emotion_analysis.get("confidence", 0),
-                "emotion_intensity": emotion_analysis.get("intensity", 0),
-                "explanation": emotion_analysis.get("explanation", "")
+                "emotion": "neutral",
+                "emotion_confidence": 0,
+                "emotion_intensity": 0,
+                "explanation": ""
             }
             
             # Add to in-memory storage
-            mock_db["transcriptions"].append(transcription)
+            add_mock_db_record("transcriptions", transcription)
             logger.info(f"Transcribed: {text}")
             
-            # Save to database if initialized
-            if db_initialized:
-                try:
-                    # Save to database with emotional data
-                    save_transcription(
-                        text=text,
-                        emotion=emotion_analysis.get("emotion", "neutral"),
-                        source="automatic"
-                    )
-                    logger.info(f"Saved transcription to database: {text[:30]}...")
-                except Exception as e:
-                    logger.error(f"Error saving transcription to database: {str(e)}")
+            if mock_db["user_preferences"]["emotion_detection_enabled"]:
+                # Saved to the database once its emotion has been analyzed
+                queue_emotion_analysis(transcription)
+            else:
+                save_transcription_to_db(transcription)
             
             return transcription
     except sr.UnknownValueError:
@@ -920,30 +1708,206 @@ def process_speech(audio_data):
     
     return None
 
+def speech_recognition_thread():
+    """Thread that transcribes queued audio chunks one at a time"""
+    while True:
+        process_speech(speech_queue.get())
+
+def save_transcription_to_db(transcription):
+    """Queue an automatic transcription for the database if it is initialized"""
+    if not db_initialized:
+        return
+    
+    # Save to database with emotional data
+    queue_db_write("transcriptions", {
+        "text": transcription["text"],
+        "emotion": transcription["emotion"],
+        "source": "automatic",
+        "timestamp": transcription.get("timestamp")
+    })
+
+def submit_emotion_analysis(text):
+    """
+    Queue text for batched emotion analysis, starting the worker if needed
+    
+    Args:
+        text: The text to analyze
+        
+    Returns:
+        concurrent.futures.Future resolved with the emotion analysis dict
+    """
+    global emotion_batch_worker_started
+    
+    future = concurrent.futures.Future()
+    with pending_emotion_condition:
+        pending_emotion_queue.append((text, future))
+        if not emotion_batch_worker_started:
+            emotion_batch_worker_started = True
+            threading.Thread(target=emotion_batch_thread, daemon=True).start()
+        pending_emotion_condition.notify()
+    return future
+
+def classify_emotion(text):
+    """
+    Analyze the emotional content of text, sharing a Gemini call with concurrent requests
+    
+    Args:
+        text: The text to analyze
+        
+    Returns:
+        Dict with emotion analysis
+    """
+    if not model:
+        logger.info(f"Using fallback emotion analysis for: '{text[:30]}...'")
+        return provide_fallback_emotion_analysis(text)
+    
+    cached_analysis = get_cached_emotion(text)
+    if cached_analysis is not None:
+        return cached_analysis
+    
+    try:
+        return submit_emotion_analysis(text).result(timeout=GEMINI_TIMEOUT + EMOTION_BATCH_INTERVAL)
+    except concurrent.futures.TimeoutError:
+        logger.error(f"Timed out waiting for batched emotion analysis of: '{text[:30]}...'")
+        return provide_fallback_emotion_analysis(text)
+
+def queue_emotion_analysis(transcription):
+    """Queue a transcription for batched emotion analysis; it is updated and saved once analyzed"""
+    cached_analysis = get_cached_emotion(transcription["text"])
+    if cached_analysis is not None:
+        apply_emotion_analysis(transcription, cached_analysis)
+        return
+    
+    future = submit_emotion_analysis(transcription["text"])
+    future.add_done_callback(lambda f: apply_emotion_analysis(transcription, f.result()))
+
+def apply_emotion_analysis(transcription, emotion_analysis):
+    """Update a stored transcription in place with its emotion analysis and save it"""
+    with mock_db_lock:
+        transcription.update({
+            "emotion": emotion_analysis.get("emotion", "neutral"),
+            "emotion_confidence": emotion_analysis.get("confidence", 0),
+            "emotion_intensity": emotion_analysis.get("intensity", 0),
+            "explanation": emotion_analysis.get("explanation", "")
+        })
+        mock_db_versions["transcriptions"] += 1
+    save_transcription_to_db(transcription)
+
+def resolve_emotion_batch(batch, analyses_future):
+    """Hand each analysis from a finished batch back to whoever queued its text"""
+    try:
+        analyses = analyses_future.result()
+        logger.info(f"Analyzed emotions for {len(batch)} texts in one batch")
+    except Exception as e:
+        logger.error(f"Error in batched emotion analysis: {str(e)}")
+        analyses = [provide_fallback_emotion_analysis(text) for text, _ in batch]
+    
+    for (_, future), emotion_analysis in zip(batch, analyses):
+        future.set_result(emotion_analysis)
+
+def emotion_batch_thread():
+    """Thread that groups queued texts into batches and starts one Gemini call for each"""
+    logger.info("Started batched emotion analysis worker")
+    
+    while True:
+        # Sleep until something is queued
+        with pending_emotion_condition:
+            while not pending_emotion_queue:
+                pending_emotion_condition.wait()
+        
+        # Give concurrent requests a chance to join the batch
+        time.sleep(EMOTION_BATCH_INTERVAL)
+        
+        while True:
+            with pending_emotion_condition:
+                batch = pending_emotion_queue[:EMOTION_BATCH_SIZE]
+                del pending_emotion_queue[:EMOTION_BATCH_SIZE]
+            
+            if not batch:
+                break
+            
+            # Don't wait for the analysis: the next batch can start while this one is in flight
+            try:
+                analyses_future = analyze_emotions_batch_with_gemini([text for text, _ in batch])
+            except Exception as e:
+                analyses_future = concurrent.futures.Future()
+                analyses_future.set_exception(e)
+            analyses_future.add_done_callback(lambda f, batch=batch: resolve_emotion_batch(batch, f))
+
 def audio_processing_thread():
-    """Main audio processing thread for real microphone input"""
+    """Main audio processing loop for real microphone input (run by the audio supervisor thread)"""
     global is_processing_audio
     
     try:
+        # Blocking mode (no callback): this thread reads straight from the device buffer
         with sd.InputStream(
-            callback=audio_callback,
             channels=CHANNELS,
             samplerate=SAMPLE_RATE,
-            blocksize=int(SAMPLE_RATE * CHUNK_DURATION),
-            dtype=DTYPE
-        ):
+            dtype=DTYPE,
+            latency=AUDIO_INPUT_LATENCY
+        ) as stream:
             logger.info("Started audio processing with REAL microphone input")
             is_processing_audio = True
             
-            while is_processing_audio:
-                process_audio_chunk(False)  # False = use real mic
-                time.sleep(0.1)  # Small sleep to prevent CPU hogging
+            # Switching to demo mode also ends the microphone run
+            while is_processing_audio and not demo_mode:
+                # False = use real mic; the read blocks until a full chunk is available
+                process_audio_chunk(False, read_audio_chunk(stream))
     except Exception as e:
         logger.error(f"Error in audio processing thread: {str(e)}")
     finally:
         is_processing_audio = False
         logger.info("Stopped microphone audio processing")
 
+def request_audio_processing():
+    """Ask the audio supervisor thread to start microphone processing, unless a run is already pending or active"""
+    global audio_start_pending
+    
+    with audio_start_lock:
+        if audio_start_pending:
+            return
+        audio_start_pending = True
+    audio_command_queue.put("start")
+
+def audio_supervisor_thread():
+    """Long-lived thread that runs microphone processing each time a start is requested"""
+    global audio_start_pending
+    
+    while True:
+        command = audio_command_queue.get()
+        if command != "start":
+            continue
+        
+        audio_stopped_event.clear()
+        try:
+            # Demo mode may have been switched on while the start was queued
+            if not demo_mode:
+                audio_processing_thread()  # Returns once is_processing_audio is cleared
+        finally:
+            with audio_start_lock:
+                audio_start_pending = False
+            audio_stopped_event.set()
+
+def claim_restart(record=True):
+    """
+    Check the restart cooldown and record a restart, atomically across request threads
+    
+    Args:
+        record: Whether to record this call as a restart if it isn't throttled
+        
+    Returns:
+        True if the caller may restart processing, False if it is throttled
+    """
+    global last_restart_time
+    
+    with restart_lock:
+        current_time = time.monotonic()
+        if last_restart_time is not None and current_time - last_restart_time < RESTART_COOLDOWN:
+            return False
+        if record:
+            last_restart_time = current_time
+        return True
+
 def demo_processing_thread():
     """Thread for demo data generation without microphone"""
     global is_demo_processing
@@ -999,12 +1963,35 @@ def init_database():
 # Initialize database
 db_initialized = init_database()
 
+# Start moving queued records into the in-memory collections
+threading.Thread(target=record_ingest_thread, daemon=True).start()
+
+# Start transcribing queued speech
+threading.Thread(target=speech_recognition_thread, daemon=True).start()
+
+# Start bulk-writing queued documents to MongoDB
+threading.Thread(target=db_write_thread, daemon=True).start()
+
+# Start the single thread that runs microphone processing on request
+threading.Thread(target=audio_supervisor_thread, daemon=True).start()
+
+# Compile YAMNet for the chunk shape in the background instead of on the first chunk
+threading.Thread(target=warm_up_yamnet, daemon=True).start()
+
 # API Routes
 @app.route('/api/status')
 def status():
     """
     Get the current status of the API and its services
     """
+    global status_response_cache
+    
+    # Reuse the serialized status for up to a second while nothing has changed
+    cache_key = (int(time.time()), is_processing_audio, demo_mode)
+    cached_key, cached_body = status_response_cache
+    if cached_key == cache_key:
+        return json_body_response(cached_body)
+    
     api_key = os.environ.get("GOOGLE_API_KEY", "")
     gemini_status = "connected"
     gemini_error = None
@@ -1022,7 +2009,7 @@ def status():
     
     status_data = {
         "status": "online",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "gemini_api": gemini_status,
         "gemini_error": gemini_error,
         "models_loaded": {
@@ -1030,29 +2017,31 @@ def status():
             "gemini": model is not None
         },
         "audio_processing": is_processing_audio,
-        "demo_mode": demo_mode
+        "demo_mode": demo_mode,
+        "emotion_cache": get_emotion_cache_stats()
     }
     
     # Log API key status
     logger.info(f"API Status request - Gemini API: {gemini_status}")
     if gemini_error:
         logger.warning(f"Gemini API issue: {gemini_error}")
-        
-    return jsonify(status_data)
+    
+    body = orjson.dumps(status_data)
+    status_response_cache = (cache_key, body)
+    return json_body_response(body)
 
 @app.route('/api/set-demo-mode', methods=['POST'])
 def set_demo_mode():
     """Set demo mode on or off"""
-    global demo_mode, is_processing_audio, is_demo_processing, last_restart_time
+    global demo_mode, is_processing_audio, is_demo_processing
     
     try:
-        data = request.json
+        data = get_json_body()
         new_demo_mode = data.get('demo_mode', False)
         
-        # Prevent rapid restarts (rate limiting)
-        current_time = time.time()
-        if last_restart_time and (current_time - last_restart_time < 2):
-            return jsonify({
+        # Prevent rapid restarts (rate limiting); only an actual mode change counts as a restart
+        if not claim_restart(record=new_demo_mode != demo_mode):
+            return json_response({
                 'success': False,
                 'error': 'Please wait before changing mode again',
                 'demo_mode': demo_mode
@@ -1070,7 +2059,7 @@ def set_demo_mode():
                 # If real audio processing is running, stop it
                 if is_processing_audio:
                     is_processing_audio = False
-                    time.sleep(0.5)  # Small delay to ensure clean shutdown
+                    audio_stopped_event.wait(timeout=0.5)  # Give the thread a moment to shut down cleanly
                 
                 # Start demo processing if not already running
                 if not is_demo_processing:
@@ -1084,16 +2073,14 @@ def set_demo_mode():
                     time.sleep(0.5)  # Small delay to ensure clean shutdown
                 
                 # Real audio processing will be started by the client if needed
-            
-            last_restart_time = current_time
                 
-        return jsonify({
+        return json_response({
             'success': True,
             'demo_mode': demo_mode
         })
     except Exception as e:
         logger.error(f"Error setting demo mode: {str(e)}")
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e),
             'demo_mode': demo_mode
@@ -1103,25 +2090,25 @@ def set_demo_mode():
 def clear_sound_alerts():
     """Clear sound alerts from the database"""
     try:
-        data = request.get_json()
+        data = get_json_body()
         user_id = data.get('user_id', 'default')
         
         if not db_initialized:
-            return jsonify({
+            return json_response({
                 "error": "Database not initialized",
                 "deleted": 0
             }), 503
         
         deleted = clear_sound_alerts_from_db(user_id)
         
-        return jsonify({
+        return json_response({
             "user_id": user_id,
             "deleted": deleted,
             "success": True
         })
     except Exception as e:
         logger.error(f"Error clearing sound alerts: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": str(e),
             "deleted": 0,
             "success": False
@@ -1131,25 +2118,25 @@ def clear_sound_alerts():
 def clear_transcriptions():
     """Clear transcriptions from the database"""
     try:
-        data = request.get_json()
+        data = get_json_body()
         user_id = data.get('user_id', 'default')
         
         if not db_initialized:
-            return jsonify({
+            return json_response({
                 "error": "Database not initialized",
                 "deleted": 0
             }), 503
         
         deleted = clear_transcriptions_from_db(user_id)
         
-        return jsonify({
+        return json_response({
             "user_id": user_id,
             "deleted": deleted,
             "success": True
         })
     except Exception as e:
         logger.error(f"Error clearing transcriptions: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": str(e),
             "deleted": 0,
             "success": False
@@ -1160,8 +2147,11 @@ def clear_data():
     """Clear all transcriptions and sound alerts"""
     try:
         # Clear the transcriptions and sound alerts in mock_db
-        mock_db["transcriptions"] = []
-        mock_db["sound_alerts"] = []
+        with mock_db_lock:
+            mock_db["transcriptions"].clear()
+            mock_db["sound_alerts"].clear()
+            mock_db_versions["transcriptions"] += 1
+            mock_db_versions["sound_alerts"] += 1
         
         # Clear database records if database is initialized
         if db_initialized:
@@ -1181,42 +2171,40 @@ def clear_data():
                 logger.error(f"Error clearing database records: {str(e)}")
         
         logger.info("Data cleared successfully")
-        return jsonify({"success": True})
+        return json_response({"success": True})
     except Exception as e:
         logger.error(f"Error clearing data: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
 
 @app.route('/api/start', methods=['POST'])
 def start_processing():
     """Start audio processing with real microphone"""
-    global is_processing_audio, last_restart_time
+    global is_processing_audio
     
     # Don't start microphone processing if in demo mode
     if demo_mode:
-        return jsonify({
+        return json_response({
             "status": "ignored",
             "message": "Cannot start microphone in demo mode",
             "demo_mode": demo_mode
         })
     
     if not is_processing_audio:
-        # Prevent rapid restarts
-        current_time = time.time()
-        if current_time - last_restart_time > 2:  # At least 2 seconds between restarts
-            last_restart_time = current_time
-            # Start in a new thread
-            threading.Thread(target=audio_processing_thread, daemon=True).start()
-            return jsonify({
+        # Prevent rapid restarts (at least RESTART_COOLDOWN seconds between them)
+        if claim_restart():
+            # Hand the start to the audio supervisor thread
+            request_audio_processing()
+            return json_response({
                 "status": "started", 
                 "demo_mode": demo_mode
             })
         else:
-            return jsonify({
+            return json_response({
                 "status": "throttled", 
                 "message": "Please wait before restarting"
             }), 429
     else:
-        return jsonify({
+        return json_response({
             "status": "already_running", 
             "demo_mode": demo_mode
         })
@@ -1229,17 +2217,17 @@ def stop_processing():
     # Only stop microphone processing, not demo processing
     if is_processing_audio:
         is_processing_audio = False
-        # Give time for thread to close
-        time.sleep(1)
-        return jsonify({"status": "stopped"})
+        # Give the thread time to close, returning as soon as it has
+        audio_stopped_event.wait(timeout=1.0)
+        return json_response({"status": "stopped"})
     else:
-        return jsonify({"status": "not_running"})
+        return json_response({"status": "not_running"})
 
 @app.route('/api/transcriptions', methods=['GET'])
 def get_transcriptions():
     """Get recent transcriptions"""
     # Get parameters with defaults
-    limit = request.args.get('limit', default=10, type=int)
+    limit = get_limit_arg(10)
     page = request.args.get('page', default=1, type=int)
     emotion = request.args.get('emotion', default=None, type=str)
     
@@ -1250,36 +2238,52 @@ def get_transcriptions():
             result = db_get_transcriptions(limit=limit, page=page, emotion=emotion)
             
             # Return the results
-            return jsonify(result)
+            return json_response(result)
         except Exception as e:
             logger.error(f"Error getting transcriptions from database: {str(e)}")
             # Fall back to in-memory storage if database fails
     
     # Use in-memory storage as fallback
-    # Filter by emotion if specified
-    filtered_transcriptions = mock_db["transcriptions"]
-    if emotion:
-        filtered_transcriptions = [t for t in filtered_transcriptions if t.get("emotion") == emotion]
+    # Records are stored oldest to newest, so read from the right end without sorting
+    # (islice rejects negative bounds, so clamp out-of-range paging)
+    skip = max(page - 1, 0) * limit
+    with mock_db_lock:
+        # Unchanged since the client's last poll: skip reading and serializing
+        etag = f'W/"{mock_db_versions["transcriptions"]}-{limit}-{page}-{emotion or ""}"'
+        if etag_matches(etag):
+            return not_modified_response(etag)
+        
+        if emotion:
+            # Snapshot under the lock, then filter by emotion without holding it
+            stored_transcriptions = list(mock_db["transcriptions"])
+        else:
+            total = len(mock_db["transcriptions"])
+            transcriptions = list(itertools.islice(reversed(mock_db["transcriptions"]), skip, skip + limit))
     
-    # Return most recent transcriptions first
-    transcriptions = sorted(
-        filtered_transcriptions, 
-        key=lambda x: x["timestamp"], 
-        reverse=True
-    )[:limit]
+    if emotion:
+        # Count matches in one pass, keeping only the requested page
+        total = 0
+        transcriptions = []
+        for t in reversed(stored_transcriptions):
+            if t.get("emotion") == emotion:
+                if skip <= total < skip + limit:
+                    transcriptions.append(t)
+                total += 1
     
-    return jsonify({
-        "total": len(filtered_transcriptions),
+    response = json_response({
+        "total": total,
         "page": page,
         "limit": limit,
         "transcriptions": transcriptions
     })
+    response.headers["ETag"] = etag
+    return response
 
 @app.route('/api/sounds', methods=['GET'])
 def get_sound_alerts():
     """Get recent sound alerts"""
     # Get parameters with defaults
-    limit = request.args.get('limit', default=10, type=int)
+    limit = get_limit_arg(10)
     page = request.args.get('page', default=1, type=int)
     
     # Check if we should use the database or in-memory storage
@@ -1289,65 +2293,196 @@ def get_sound_alerts():
             result = db_get_sound_alerts(limit=limit, page=page)
             
             # Return the results
-            return jsonify(result)
+            return json_response(result)
         except Exception as e:
             logger.error(f"Error getting sound alerts from database: {str(e)}")
             # Fall back to in-memory storage if database fails
     
     # Use in-memory storage as fallback
-    # Return most recent sound alerts first
-    alerts = sorted(
-        mock_db["sound_alerts"], 
-        key=lambda x: x["timestamp"], 
-        reverse=True
-    )[:limit]
-    
-    return jsonify({
-        "total": len(mock_db["sound_alerts"]),
+    # Return most recent sound alerts first (stored oldest to newest)
+    # (islice rejects negative bounds, so clamp out-of-range paging)
+    skip = max(page - 1, 0) * limit
+    with mock_db_lock:
+        # Unchanged since the client's last poll: skip reading and serializing
+        etag = f'W/"{mock_db_versions["sound_alerts"]}-{limit}-{page}"'
+        if etag_matches(etag):
+            return not_modified_response(etag)
+        
+        total = len(mock_db["sound_alerts"])
+        alerts = list(itertools.islice(reversed(mock_db["sound_alerts"]), skip, skip + limit))
+    
+    response = json_response({
+        "total": total,
         "page": page,
         "limit": limit,
         "soundAlerts": alerts
     })
+    response.headers["ETag"] = etag
+    return response
 
 @app.route('/api/preferences', methods=['GET', 'PUT'])
 def manage_preferences():
     """Get or update user preferences (in-memory only)"""
+    global preferences_response_body, preferences_version
+    
     if request.method == 'GET':
-        return jsonify(mock_db["user_preferences"])
+        # Serialize once and reuse until the preferences change
+        with preferences_lock:
+            etag = f'W/"{preferences_version}"'
+            if etag_matches(etag):
+                return not_modified_response(etag)
+            if preferences_response_body is None:
+                preferences_response_body = orjson.dumps(mock_db["user_preferences"])
+            body = preferences_response_body
+        response = json_body_response(body)
+        response.headers["ETag"] = etag
+        return response
     elif request.method == 'PUT':
         try:
-            new_preferences = request.json
-            # Update only provided fields
-            for key, value in new_preferences.items():
-                if key in mock_db["user_preferences"]:
-                    mock_db["user_preferences"][key] = value
-            return jsonify(mock_db["user_preferences"])
+            new_preferences = get_json_body()
+            with preferences_lock:
+                # Update only provided fields that are known preferences
+                user_preferences = mock_db["user_preferences"]
+                user_preferences.update({
+                    key: new_preferences[key] for key in user_preferences.keys() & new_preferences.keys()
+                })
+                preferences_version += 1
+                etag = f'W/"{preferences_version}"'
+                preferences_response_body = orjson.dumps(mock_db["user_preferences"])
+                body = preferences_response_body
+            response = json_body_response(body)
+            response.headers["ETag"] = etag
+            return response
         except Exception as e:
-            return jsonify({"error": str(e)}), 400
+            return json_response({"error": str(e)}), 400
 
 @app.route('/api/analyze/text', methods=['POST'])
 def analyze_text():
     """Analyze text for emotion"""
     try:
-        text = request.json.get('text', '')
+        text = get_json_body().get('text', '')
         if not text:
-            return jsonify({"error": "No text provided"}), 400
+            return json_response({"error": "No text provided"}), 400
+        if len(text) > MAX_TEXT_LENGTH:
+            return json_response({"error": f"Text too long (maximum {MAX_TEXT_LENGTH} characters)"}), 413
             
-        analysis = analyze_emotion_with_gemini(text)
-        return jsonify(analysis)
+        analysis = classify_emotion(text)
+        return json_response(analysis)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}), 500
+
+@app.route('/api/analyze/cache/clear', methods=['POST'])
+def clear_emotion_cache():
+    """Clear cached emotion analyses"""
+    with emotion_cache_lock:
+        cleared = len(emotion_cache)
+        emotion_cache.clear()
+    
+    logger.info(f"Cleared {cleared} cached emotion analyses")
+    return json_response({"success": True, "cleared": cleared})
 
 @app.route('/api/audio-levels', methods=['GET'])
 def get_audio_levels():
     """Get current audio levels for visualization"""
-    return jsonify({
-        "levels": audio_level_history,
+    return json_response({
+        "levels": list(audio_level_history),
         "is_processing": is_processing_audio
     })
 
+@app.route('/api/audio-levels/stream', methods=['GET'])
+def stream_audio_levels():
+    """
+    Stream audio levels for visualization as server-sent events
+    
+    The first event carries the whole history as "levels"; each later event
+    carries one new "level" as soon as it is measured. The stream ends after
+    AUDIO_LEVEL_STREAM_MAX_AGE seconds so it doesn't hold a thread forever;
+    EventSource reconnects on its own.
+    """
+    if not stream_slots.acquire(blocking=False):
+        logger.warning("Audio level stream refused: too many streams open")
+        return json_response({
+            "error": f"Too many streams open (maximum {STREAM_MAX_CONCURRENT})"
+        }), 503
+    
+    def generate_events():
+        with audio_level_condition:
+            levels = list(audio_level_history)
+            sent_count = audio_level_count
+        # Ask EventSource to reconnect quickly when the stream ends
+        yield b"retry: 1000\ndata: " + orjson.dumps({"levels": levels, "is_processing": is_processing_audio}) + b"\n\n"
+        
+        deadline = time.monotonic() + AUDIO_LEVEL_STREAM_MAX_AGE
+        while time.monotonic() < deadline:
+            with audio_level_condition:
+                has_new_level = audio_level_condition.wait_for(
+                    lambda: audio_level_count != sent_count,
+                    timeout=AUDIO_LEVEL_STREAM_KEEPALIVE
+                )
+                # Levels older than the history are gone; send whatever is still held
+                new_level_count = min(audio_level_count - sent_count, MAX_AUDIO_HISTORY) if has_new_level else 0
+                new_levels = list(audio_level_history)[-new_level_count:] if new_level_count else []
+                sent_count = audio_level_count
+            
+            if not new_levels:
+                yield b": keep-alive\n\n"
+            for level in new_levels:
+                yield b"data: " + orjson.dumps({"level": level}) + b"\n\n"
+    
+    response = Response(generate_events(),
+                        mimetype='text/event-stream',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Runs once the stream ends or the client disconnects, even if it never started
+    response.call_on_close(stream_slots.release)
+    return response
+
 # ========== CHAT FUNCTIONALITY ==========
 
+def build_chat_prompt(message, context):
+    """
+    Build the per-message chat prompt from CHAT_PROMPT_TEMPLATE
+    
+    Args:
+        message: The user's chat message
+        context: Dict with optional "emotion" and "intensity" keys
+        
+    Returns:
+        Prompt string for chat_model
+    """
+    return CHAT_PROMPT_TEMPLATE.format(
+        message=message,
+        emotion=context.get('emotion', 'neutral'),
+        intensity=context.get('intensity', 'medium')
+    )
+
+def read_chat_request():
+    """
+    Parse and type-check the JSON body shared by the chat endpoints
+    
+    Returns:
+        Tuple of (message, context, user_id)
+        
+    Raises:
+        ValueError: If the body isn't a JSON object or a field has the wrong type
+    """
+    try:
+        data = get_json_body()
+    except BadRequest:
+        raise ValueError("Request body is not valid JSON")
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    
+    message = data.get('message', '')
+    context = data.get('context', {})
+    user_id = data.get('user_id', 'default')
+    if not isinstance(message, str):
+        raise ValueError("'message' must be a string")
+    if not isinstance(context, dict):
+        raise ValueError("'context' must be an object")
+    if not isinstance(user_id, str):
+        raise ValueError("'user_id' must be a string")
+    return message, context, user_id
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """
@@ -1355,39 +2490,50 @@ def chat():
     """
     # Check if Gemini model is available
     if model is None:
-        return jsonify({
+        return json_response({
             "error": "Gemini API is not available. Please configure a valid API key.",
             "response": "I'm sorry, I can't process your message right now because the Gemini API is not configured. Please add a GOOGLE_API_KEY to the environment variables.",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }), 503
     
     try:
         # Get request data
-        data = request.get_json()
-        message = data.get('message', '')
-        context = data.get('context', {})
-        user_id = data.get('user_id', 'default')
+        try:
+            message, context, user_id = read_chat_request()
+        except ValueError as e:
+            return json_response({
+                "error": str(e),
+                "response": "I'm sorry, I couldn't read your message. Please try again.",
+                "timestamp": now_iso()
+            }), 400
+        if not message.strip():
+            return json_response({
+                "error": "No message provided",
+                "response": "Please type a message.",
+                "timestamp": now_iso()
+            }), 400
+        if len(message) > MAX_TEXT_LENGTH:
+            return json_response({
+                "error": f"Message too long (maximum {MAX_TEXT_LENGTH} characters)",
+                "response": "I'm sorry, your message is too long. Please shorten it and try again.",
+                "timestamp": now_iso()
+            }), 413
         
         # Log request
         logger.info(f"Chat request received: {message[:30]}... with context: {context}")
         
-        # Create prompt with user's message and emotional context
-        prompt = f"""You are EchoLens.AI, an AI assistant specialized in helping deaf and hard-of-hearing users understand their audio environment.
-        
-User Message: "{message}"
-Emotional Context: {context.get('emotion', 'neutral')} (Intensity: {context.get('intensity', 'medium')})
-
-Respond to the user in a way that acknowledges their emotional state and provides helpful information.
-If the user seems confused or frustrated, be extra clear and supportive in your response.
-If the user is asking about sounds or audio features, explain how EchoLens can help detect and classify important sounds.
-If the user mentions emotions or speech detection, explain how EchoLens can analyze speech for emotional content.
-
-Keep your response concise (2-4 sentences) and friendly.
-"""
-        
-        # Generate response with Gemini
-        response = model.generate_content(prompt)
-        response_text = response.text
+        # Reuse a reply to the same prompt from the last CHAT_CACHE_TTL seconds,
+        # otherwise generate one with Gemini
+        prompt = build_chat_prompt(message, context)
+        with chat_reply_cache_lock:
+            response_text = chat_reply_cache.get(prompt)
+        if response_text is None:
+            response = generate_with_gemini(prompt, chat_model)
+            response_text = response.text
+            with chat_reply_cache_lock:
+                chat_reply_cache[prompt] = response_text
+        else:
+            logger.info("Reusing cached chat response")
         
         # Save chat message to database
         if db_initialized:
@@ -1401,38 +2547,142 @@ Keep your response concise (2-4 sentences) and friendly.
         logger.info(f"Chat response generated: {response_text[:50]}...")
         
         # Return response
-        return jsonify({
+        return json_response({
             "response": response_text,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         })
         
+    except GeminiBusyError as e:
+        logger.warning(f"Chat request refused: {str(e)}")
+        return json_response({
+            "error": str(e),
+            "response": "I'm getting a lot of messages right now. Please try again in a moment.",
+            "timestamp": now_iso()
+        }), 503
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": str(e),
             "response": "I'm sorry, I encountered an error processing your message.",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Process chat messages using Gemini API, streaming the reply as server-sent events
+    
+    Each event carries a JSON object with a "delta" text fragment; the stream
+    ends with a "[DONE]" event, or an "error" object if generation fails.
+    """
+    # Check if Gemini model is available
+    if model is None:
+        return json_response({
+            "error": "Gemini API is not available. Please configure a valid API key.",
+            "timestamp": now_iso()
+        }), 503
+    
+    try:
+        message, context, user_id = read_chat_request()
+    except ValueError as e:
+        return json_response({
+            "error": str(e),
+            "timestamp": now_iso()
+        }), 400
+    if not message.strip():
+        return json_response({
+            "error": "No message provided",
+            "timestamp": now_iso()
+        }), 400
+    if len(message) > MAX_TEXT_LENGTH:
+        return json_response({
+            "error": f"Message too long (maximum {MAX_TEXT_LENGTH} characters)",
+            "timestamp": now_iso()
+        }), 413
+    
+    logger.info(f"Streaming chat request received: {message[:30]}... with context: {context}")
+    
+    # The stream counts against the Gemini cap until the response is closed
+    try:
+        acquire_gemini_slot()
+    except GeminiBusyError as e:
+        logger.warning(f"Streaming chat request refused: {str(e)}")
+        return json_response({
+            "error": str(e),
+            "timestamp": now_iso()
+        }), 503
+    
+    def generate_events():
+        response_parts = []
+        try:
+            response = chat_model.generate_content(
+                build_chat_prompt(message, context),
+                stream=True,
+                request_options={"timeout": GEMINI_TIMEOUT}
+            )
+            for chunk in response:
+                response_parts.append(chunk.text)
+                yield b"data: " + orjson.dumps({"delta": chunk.text}) + b"\n\n"
+        except Exception as e:
+            logger.error(f"Error in streaming chat endpoint: {str(e)}")
+            yield b"data: " + orjson.dumps({"error": str(e)}) + b"\n\n"
+            return
+        
+        response_text = "".join(response_parts)
+        logger.info(f"Streamed chat response generated: {response_text[:50]}...")
+        
+        # Save chat message to database once the full reply is known
+        if db_initialized:
+            try:
+                save_chat_message(message, response_text, context, user_id)
+                logger.info(f"Chat message saved to database for user {user_id}")
+            except Exception as e:
+                logger.error(f"Failed to save chat message to database: {str(e)}")
+        
+        yield b"data: [DONE]\n\n"
+    
+    response = Response(stream_with_context(generate_events()),
+                        mimetype='text/event-stream',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Runs once the stream ends or the client disconnects, even if it never started
+    response.call_on_close(gemini_slots.release)
+    return response
+
 @app.route('/api/chat_with_context', methods=['POST'])
 def chat_with_context():
     """
     Enhanced chat with environmental context and conversation history
     """
     # Check if Gemini model is available
-    if model is None or chat is None:
-        return jsonify({
+    if model is None or context_chat is None:
+        return json_response({
             "error": "Gemini API is not available. Please configure a valid API key.",
             "response": "I'm sorry, I can't process your message right now because the Gemini API is not configured.",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }), 503
     
     try:
         # Get request data
-        data = request.get_json()
-        message = data.get('message', '')
-        context = data.get('context', {})
-        user_id = data.get('user_id', 'default')
+        try:
+            message, context, user_id = read_chat_request()
+        except ValueError as e:
+            return json_response({
+                "error": str(e),
+                "response": "I'm sorry, I couldn't read your message. Please try again.",
+                "timestamp": now_iso()
+            }), 400
+        if not message.strip():
+            return json_response({
+                "error": "No message provided",
+                "response": "Please type a message.",
+                "timestamp": now_iso()
+            }), 400
+        if len(message) > MAX_TEXT_LENGTH:
+            return json_response({
+                "error": f"Message too long (maximum {MAX_TEXT_LENGTH} characters)",
+                "response": "I'm sorry, your message is too long. Please shorten it and try again.",
+                "timestamp": now_iso()
+            }), 413
         
         # Get environmental context if available
         sounds = context.get('sounds', [])
@@ -1444,8 +2694,8 @@ def chat_with_context():
         emotion = context.get('emotion', {})
         emotion_text = f"Your emotional state: {emotion.get('emotion', 'neutral')} (intensity: {emotion.get('intensity', 'medium')})"
         
-        # Get visual context if available
-        image_base64 = get_latest_frame_base64()
+        # Get visual context if available (raw JPEG bytes, since Gemini takes bytes)
+        image_jpeg = get_latest_frame_jpeg()
         
         # Create the prompt with all context information
         prompt = f"""User message: {message}
@@ -1459,20 +2709,24 @@ Respond in a helpful, concise way while considering all this context information
 """
         
         # Send to the chat API with all context
-        if image_base64:
-            # Multimodal input with image
-            response = chat.send_message(
-                [
-                    prompt,
-                    {
-                        "mime_type": "image/jpeg",
-                        "data": base64.b64decode(image_base64)
-                    }
-                ]
-            )
-        else:
-            # Text-only input
-            response = chat.send_message(prompt)
+        acquire_gemini_slot()
+        try:
+            if image_jpeg:
+                # Multimodal input with image
+                response = context_chat.send_message(
+                    [
+                        prompt,
+                        {
+                            "mime_type": "image/jpeg",
+                            "data": image_jpeg
+                        }
+                    ]
+                )
+            else:
+                # Text-only input
+                response = context_chat.send_message(prompt)
+        finally:
+            gemini_slots.release()
         
         # Save chat message to database
         if db_initialized:
@@ -1483,17 +2737,24 @@ Respond in a helpful, concise way while considering all this context information
                 logger.error(f"Failed to save contextual chat message to database: {str(e)}")
         
         # Return the response
-        return jsonify({
+        return json_response({
             "response": response.text,
-            "has_visual_context": image_base64 is not None,
-            "timestamp": datetime.now().isoformat()
+            "has_visual_context": image_jpeg is not None,
+            "timestamp": now_iso()
         })
+    except GeminiBusyError as e:
+        logger.warning(f"Contextual chat request refused: {str(e)}")
+        return json_response({
+            "error": str(e),
+            "response": "I'm getting a lot of messages right now. Please try again in a moment.",
+            "timestamp": now_iso()
+        }), 503
     except Exception as e:
         logger.error(f"Error in contextual chat: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": str(e),
             "response": "I'm sorry, I encountered an error while processing your message.",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }), 500
 
 # Add a new endpoint to retrieve chat history
@@ -1504,24 +2765,24 @@ def get_chat_message_history():
     """
     try:
         user_id = request.args.get('user_id', 'default')
-        limit = request.args.get('limit', 20, type=int)
+        limit = get_limit_arg(20)
         
         if not db_initialized:
-            return jsonify({
+            return json_response({
                 "error": "Database not initialized",
                 "messages": []
             }), 503
         
         messages = get_chat_history(limit, user_id)
         
-        return jsonify({
+        return json_response({
             "user_id": user_id,
             "count": len(messages),
             "messages": messages
         })
     except Exception as e:
         logger.error(f"Error getting chat history: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": str(e),
             "messages": []
         }), 500
@@ -1533,25 +2794,25 @@ def clear_chat_message_history():
     Clear chat message history for a user
     """
     try:
-        data = request.get_json()
+        data = get_json_body()
         user_id = data.get('user_id', 'default')
         
         if not db_initialized:
-            return jsonify({
+            return json_response({
                 "error": "Database not initialized",
                 "deleted": 0
             }), 503
         
         deleted = clear_chat_history(user_id)
         
-        return jsonify({
+        return json_response({
             "user_id": user_id,
             "deleted": deleted,
             "success": True
         })
     except Exception as e:
         logger.error(f"Error clearing chat history: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": str(e),
             "deleted": 0,
             "success": False
@@ -1559,12 +2820,20 @@ def clear_chat_message_history():
 
 # ========== APP INITIALIZATION ==========
 
-@app.before_first_request
-def on_first_request():
-    """Auto-start processing on first request based on mode"""
-    global is_processing_audio, is_demo_processing, last_restart_time
+# Set once processing has been auto-started, so it only happens once per process
+processing_auto_started = False
+auto_start_lock = threading.Lock()
+
+def auto_start_processing():
+    """Start processing for the current mode, once per process (later calls do nothing)"""
+    global processing_auto_started
+    
+    with auto_start_lock:
+        if processing_auto_started:
+            return
+        processing_auto_started = True
     
-    last_restart_time = time.time()
+    claim_restart()
     
     if demo_mode and not is_demo_processing:
         # Start demo processing
@@ -1572,9 +2841,14 @@ def on_first_request():
         logger.info("Auto-started demo processing")
     elif not demo_mode and not is_processing_audio:
         # Start real audio processing
-        threading.Thread(target=audio_processing_thread, daemon=True).start()
+        request_audio_processing()
         logger.info("Auto-started microphone processing")
 
+@app.before_first_request
+def on_first_request():
+    """Auto-start processing on first request based on mode"""
+    auto_start_processing()
+
 # ========== API ENDPOINTS FOR MULTIMODAL FEATURES ==========
 
 @app.route('/api/analyze/environment', methods=['POST'])
@@ -1584,42 +2858,54 @@ def analyze_environment():
     """
     # Check if Gemini model is available
     if model is None:
-        return jsonify({
+        return json_response({
             "error": "Gemini API is not available. Please configure a valid API key.",
             "analysis": "I'm sorry, I can't analyze your environment right now because the Gemini API is not configured.",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }), 503
     
     try:
         # Get request data
-        data = request.get_json()
+        data = get_json_body()
         
         # Extract available data
         audio_text = data.get('transcription', '')
+        if len(audio_text) > MAX_TEXT_LENGTH:
+            return json_response({
+                "error": f"Transcription too long (maximum {MAX_TEXT_LENGTH} characters)",
+                "timestamp": now_iso()
+            }), 413
         sound_classes = data.get('sounds', [])
         direction_data = data.get('direction', {})
         emotion_data = data.get('emotion', {})
         
         # Get latest camera frame if available
-        image_base64 = get_latest_frame_base64()
+        image_jpeg = get_latest_frame_jpeg()
         
         # Perform multimodal analysis
         analysis = analyze_multimodal_with_gemini(
             audio_text, 
-            image_base64, 
+            image_jpeg, 
             sound_classes, 
             direction_data, 
             emotion_data
         )
         
         # Return the analysis
-        return jsonify(analysis)
+        return json_response(analysis)
+    except GeminiBusyError as e:
+        logger.warning(f"Environment analysis request refused: {str(e)}")
+        return json_response({
+            "error": str(e),
+            "analysis": "I'm getting a lot of requests right now. Please try again in a moment.",
+            "timestamp": now_iso()
+        }), 503
     except Exception as e:
         logger.error(f"Error in environment analysis endpoint: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": f"Failed to analyze environment: {str(e)}",
             "analysis": "An error occurred while analyzing your environment.",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }), 500
 
 @app.route('/api/camera/start', methods=['POST'])
@@ -1628,9 +2914,9 @@ def start_camera():
     Start the webcam for visual input
     """
     if start_webcam_capture():
-        return jsonify({"status": "success", "message": "Camera started successfully"})
+        return json_response({"status": "success", "message": "Camera started successfully"})
     else:
-        return jsonify({"status": "error", "message": "Failed to start camera"}), 500
+        return json_response({"status": "error", "message": "Failed to start camera"}), 500
 
 @app.route('/api/camera/stop', methods=['POST'])
 def stop_camera():
@@ -1638,25 +2924,26 @@ def stop_camera():
     Stop the webcam
     """
     if stop_webcam_capture():
-        return jsonify({"status": "success", "message": "Camera stopped successfully"})
+        return json_response({"status": "success", "message": "Camera stopped successfully"})
     else:
-        return jsonify({"status": "error", "message": "Failed to stop camera"}), 500
+        return json_response({"status": "error", "message": "Failed to stop camera"}), 500
 
 @app.route('/api/camera/snapshot')
 def get_camera_snapshot():
     """
     Get the latest camera snapshot as base64
     """
-    quality = request.args.get('quality', default=70, type=int)
+    # JPEG quality runs from 1 to 100
+    quality = min(max(request.args.get('quality', default=70, type=int), 1), 100)
     image_base64 = get_latest_frame_base64(quality)
     if image_base64:
-        return jsonify({
+        return json_response({
             "status": "success", 
             "image": image_base64,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         })
     else:
-        return jsonify({
+        return json_response({
             "status": "error", 
             "message": "No camera image available"
         }), 404
@@ -1667,15 +2954,17 @@ def video_stream():
     """
     Stream video as MJPEG for more efficient viewing
     """
+    if not stream_slots.acquire(blocking=False):
+        logger.warning("Camera stream refused: too many streams open")
+        return json_response({
+            "error": f"Too many streams open (maximum {STREAM_MAX_CONCURRENT})"
+        }), 503
+    
     def generate_frames():
-        global last_frame
         while is_capturing_video and webcam is not None:
-            if last_frame is not None:
-                # Use lower quality JPEG encoding for streaming
-                encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), 50]  # Lower quality for streaming
-                _, buffer = cv2.imencode('.jpg', last_frame, encode_params)
-                frame_bytes = buffer.tobytes()
-                
+            # Lower quality JPEG for streaming (encoded once per captured frame)
+            frame_bytes = get_latest_frame_jpeg(50)
+            if frame_bytes is not None:
                 yield (b'--frame\r\n'
                        b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
             else:
@@ -1684,8 +2973,10 @@ def video_stream():
                        b'Content-Type: image/jpeg\r\n\r\n\r\n')
             time.sleep(0.04)  # ~25 FPS
     
-    return Response(generate_frames(),
-                    mimetype='multipart/x-mixed-replace; boundary=frame')
+    response = Response(generate_frames(),
+                        mimetype='multipart/x-mixed-replace; boundary=frame')
+    response.call_on_close(stream_slots.release)
+    return response
 
 # Clear sound alerts from database
 def clear_sound_alerts_from_db(user_id="default"):
@@ -1715,16 +3006,7 @@ if __name__ == '__main__':
     logger.info(f"Database initialization status: {'Success' if db_status else 'Failed'}")
     
     # Auto-start appropriate processing mode
-    last_restart_time = time.time()
-    
-    if demo_mode:
-        # Start demo processing
-        threading.Thread(target=demo_processing_thread, daemon=True).start()
-        logger.info("Auto-started demo processing")
-    else:
-        # Start real audio processing
-        threading.Thread(target=audio_processing_thread, daemon=True).start()
-        logger.info("Auto-started microphone processing")
+    auto_start_processing()
     
     # Get port from environment variable
     port = int(os.environ.get("PORT", 5000))
@@ -0,0 +1,66 @@
+"""
+Tests for conditional GETs on the in-memory list endpoints.
+Run with pytest from the backend directory.
+"""
+
+import pytest
+
+import echolens_api
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The first request would otherwise auto-start the microphone or demo processing
+    monkeypatch.setattr(echolens_api, "processing_auto_started", True)
+    monkeypatch.setattr(echolens_api, "db_initialized", False)
+
+    # Restore the in-memory records and their versions after each test
+    with echolens_api.mock_db_lock:
+        saved_records = {
+            collection: list(echolens_api.mock_db[collection])
+            for collection in echolens_api.mock_db_versions
+        }
+        saved_versions = dict(echolens_api.mock_db_versions)
+
+    yield echolens_api.app.test_client()
+
+    with echolens_api.mock_db_lock:
+        for collection, records in saved_records.items():
+            echolens_api.mock_db[collection].clear()
+            echolens_api.mock_db[collection].extend(records)
+        echolens_api.mock_db_versions.update(saved_versions)
+
+
+def make_transcription(i):
+    return {
+        "id": f"test-{i}",
+        "text": f"Sample transcription number {i} long enough to push the page past the compression threshold",
+        "emotion": "neutral",
+        "timestamp": "2025-01-01T00:00:00"
+    }
+
+
+def test_compressed_transcriptions_return_304(client):
+    with echolens_api.mock_db_lock:
+        echolens_api.mock_db["transcriptions"].extend(make_transcription(i) for i in range(20))
+        echolens_api.mock_db_versions["transcriptions"] += 1
+
+    headers = {"Accept-Encoding": "gzip"}
+
+    first = client.get("/api/transcriptions?limit=20", headers=headers)
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == "gzip"
+    etag = first.headers["ETag"]
+    assert etag.endswith(':gzip"')
+
+    second = client.get("/api/transcriptions?limit=20", headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 304
+
+
+def test_uncompressed_preferences_return_304(client):
+    first = client.get("/api/preferences")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = client.get("/api/preferences", headers={"If-None-Match": etag})
+    assert second.status_code == 304
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for running the EchoLens API under gunicorn.
+
+Run with a single gthread worker; transcriptions, alerts and the audio
+processing thread live in process memory and must not be duplicated:
+
+    gunicorn --workers 1 --worker-class gthread --threads 16 --bind 0.0.0.0:10000 wsgi:app
+"""
+
+from echolens_api import app
+
+__all__ = ["app"]